@@ -1,38 +1,39 @@
 # Core imports
+import hashlib
 import secrets
 import string
-import stripe
 from authlib.integrations.flask_client import OAuth
 from urllib.parse import quote_plus, urlencode
 from os import environ as env
-from flask import Flask, render_template, request, jsonify, redirect, render_template, session, url_for, Response, abort
+from flask import Flask, render_template, request, jsonify, redirect, render_template, session, url_for, Response, abort, g, stream_with_context
+import json
 from flask_cors import CORS
 import traceback
-from tools.fact_checker import FactChecker
-from db.facts_db import FactsDB
+import click
+from collections import Counter
 from config.config import Config
+from config.api_config import APIConfig
 from tools.logger import logger
-from db.user_db import UserDB
-from tools.meme2txt_processor import Meme2TxtProcessor
-import nltk
-import requests
+from db.connection_pool import DatabaseUnavailable
+import httpx
+from tools import http_client, registry
+from tools.rate_limit import describe_rate_limits, parse_rate_limits
+from werkzeug.local import LocalProxy
 # used only allowing routes to be access by active subscription users
 from functools import wraps
-from slugify import slugify
 
-# Rate limiting imports
-from flask_limiter import Limiter
+# Client address the free route is rate limited and metered by
 from flask_limiter.util import get_remote_address
 
-# Initilize user_db
-user_db = UserDB()
+# Initilize user_db, its MySQL connections are opened on first use
+user_db = LocalProxy(lambda: registry.get("user_db"))
 
 # Core flask app
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 CORS(app)
 app.config.from_object(Config)  # get config information
-# Initilize Stripe with your SK
-stripe.api_key = app.config["STRIPE_SECRET_KEY"]
+# Stripe is imported and given the SK on first use, see tools/registry.py
+stripe = LocalProxy(lambda: registry.get("stripe"))
 
 
 # Initiate Auth0
@@ -48,15 +49,16 @@ oauth.register(
     server_metadata_url=f'https://{app.config["AUTH0_DOMAIN"]}/.well-known/openid-configuration'
 )
 
-# Initialize FactChecker
-facts_db = FactsDB(db_uri="./localdb")
-fact_checker = FactChecker(db=facts_db)
+# One FactsDB and FactChecker per process, shared by every route and created on first use
+# (or right after fork by gunicorn.conf.py) instead of at import
+facts_db = LocalProxy(lambda: registry.get("facts_db"))
+fact_checker = LocalProxy(lambda: registry.get("fact_checker"))
 
-# Initialize the limiter for free users, does not apply to paid users
-limiter = Limiter(
-    key_func=get_remote_address,
-    app=app
-)
+# Usage counts per API key / account and IP, flushed to MySQL in bulk, and the token buckets
+# every worker on the host shares for rate limits
+usage_meter = LocalProxy(lambda: registry.get("usage_meter"))
+free_rate_limits = LocalProxy(lambda: registry.get("free_rate_limits"))
+paid_rate_limits = LocalProxy(lambda: registry.get("paid_rate_limits"))
 
 # Decorator to check if the user has an active subscription to access certain routes
 
@@ -74,20 +76,31 @@ def require_active_subscription(f):
             return jsonify({'error': 'Authentication required'}), 401
 
         # Session takes precedence over x-api-key, so let's check that one first
-        if 'user' in session:
-            logger.debug(f"Checking session")
-            auth0_user_id = session['user']['userinfo']['sub']
-            user = user_db.get_user_by_auth0_id(auth0_user_id)
-
-            if not user or user.get('subscription_status') != 'active':
-                return jsonify({'error': 'Active subscription required'}), 403
-        elif 'x-api-key' in request.headers:
-            api_key = request.headers.get('x-api-key')
-            logger.debug(f"Checking API key")
-            user = user_db.get_user_by_api_key(api_key)
-
-            if not user or user.get('subscription_status') != 'active':
-                return jsonify({'error': 'Active subscription required'}), 403
+        try:
+            if 'user' in session:
+                logger.debug(f"Checking session")
+                auth0_user_id = session['user']['userinfo']['sub']
+                user = user_db.get_cached_user(auth0_user_id=auth0_user_id)
+            else:
+                api_key = request.headers.get('x-api-key')
+                logger.debug(f"Checking API key")
+                user = user_db.get_cached_user(api_key=api_key)
+        except DatabaseUnavailable as e:
+            # Fail fast so the client can retry, rather than holding the request thread
+            logger.error(f"Subscription check failed: {str(e)}")
+            return jsonify({'error': 'Service temporarily unavailable, please retry shortly'}), 503, {'Retry-After': str(int(Config.MYSQL_RETRY_INTERVAL))}
+
+        if not user or user.get('subscription_status') != 'active':
+            return jsonify({'error': 'Active subscription required'}), 403
+
+        # Who the request is metered and rate limited as: the account, also for API key callers, so
+        # the secret key never ends up in the usage table or the rate limit store on disk. Keys
+        # without a linked account go by the key's hash.
+        if user.get('auth0_user_id'):
+            g.usage_subject = ('user', user['auth0_user_id'])
+        else:
+            api_key = user.get('api_key') or request.headers.get('x-api-key', '')
+            g.usage_subject = ('key', hashlib.sha256(api_key.encode('utf-8')).hexdigest())
 
         return f(*args, **kwargs)
     return decorated_function
@@ -98,6 +111,9 @@ def require_active_subscription(f):
 @app.route('/check', methods=['POST'])
 @require_active_subscription
 def check_text():
+    stream_format = requested_stream_format()
+    if stream_format is not None and stream_format not in STREAM_FORMATS:
+        return jsonify({'error': f"Invalid stream format '{stream_format}'. Use one of: {', '.join(STREAM_FORMATS)}"}), 400
     try:
         data = request.json
         if not data or 'text' not in data:
@@ -110,21 +126,24 @@ def check_text():
                 f"Invalid input: 'text' is empty or not a string. Received: {type(text)}")
             return jsonify({'error': 'Invalid input. "text" must be a non-empty string.'}), 400
 
+        # Only valid requests spend tokens
+        retry_after = paid_rate_limits.take(':'.join(g.usage_subject))
+        if retry_after:
+            return jsonify({'error': 'Rate limit exceeded, please try again later.'}), 429, {'Retry-After': str(retry_after)}
+
         # Log first 50 characters of input
         logger.info(f"Analyzing text: {text[:50]}...")
-        results = fact_checker.analyze_text(text)
+        if stream_format:
+            return stream_fact_checks(text, stream_format)
+        usage = Counter(requests=1)
+        # New checks are persisted by the background writer in one batch, errors are logged there
+        results = fact_checker.analyze_text(text, usage=usage, save=True)
+        record_usage(usage)
 
         if not results:
             logger.info("No fact-check results available for the given text.")
             return jsonify({'message': 'No fact-check results available for the given text.'}), 204
 
-        for result in results:
-            try:
-                fact_checker.save_fact_check(result)
-            except Exception as save_error:
-                logger.error(
-                    f"Error saving fact check: {str(save_error)}\n{result}")
-
         logger.info(f"Successfully processed {len(results)} fact checks")
         return jsonify(results), 200, {'Content-Type': 'application/json'}
 
@@ -133,11 +152,13 @@ def check_text():
         logger.error(traceback.format_exc())
         return jsonify({'error': 'An unexpected error occurred while processing your request.'}), 500
 
-# Route for free users to check text has a limit of 3 per day and 1 per hour
+# Route for free users to check text, rate limited per IP by FREE_RATE_LIMITS across all workers
 
 @app.route('/check-free', methods=['POST'])
-#@limiter.limit("5 per minute;15 per day")
 def check_text_free():
+    stream_format = requested_stream_format()
+    if stream_format is not None and stream_format not in STREAM_FORMATS:
+        return jsonify({'error': f"Invalid stream format '{stream_format}'. Use one of: {', '.join(STREAM_FORMATS)}"}), 400
     try:
         data = request.json
         if not data or 'text' not in data:
@@ -150,21 +171,24 @@ def check_text_free():
                 f"Invalid input: 'text' is empty or not a string. Received: {type(text)}")
             return jsonify({'error': 'Invalid input. "text" must be a non-empty string.'}), 400
 
+        # Only valid requests spend tokens
+        retry_after = free_rate_limits.take(f"ip:{get_remote_address()}")
+        if retry_after:
+            return jsonify(error=FREE_RATE_LIMIT_MESSAGE), 429, {'Retry-After': str(retry_after)}
+
         # Log first 50 characters of input
         logger.info(f"Analyzing text: {text[:50]}...")
-        results = fact_checker.analyze_text(text)
+        if stream_format:
+            return stream_fact_checks(text, stream_format)
+        usage = Counter(requests=1)
+        # New checks are persisted by the background writer in one batch, errors are logged there
+        results = fact_checker.analyze_text(text, usage=usage, save=True)
+        record_usage(usage)
 
         if not results:
             logger.info("No fact-check results available for the given text.")
             return jsonify({'message': 'No fact-check results available for the given text.'}), 204
 
-        for result in results:
-            try:
-                fact_checker.save_fact_check(result)
-            except Exception as save_error:
-                logger.error(
-                    f"Error saving fact check: {str(save_error)}\n{result}")
-
         logger.info(f"Successfully processed {len(results)} fact checks")
         return jsonify(results), 200, {'Content-Type': 'application/json'}
 
@@ -173,12 +197,64 @@ def check_text_free():
         logger.error(traceback.format_exc())
         return jsonify({'error': 'An unexpected error occurred while processing your request.'}), 500
 
-# Used for rate limiting for free users in the route /check-free
+# Counts a checked request for its IP and, on paid routes, its account
+def record_usage(usage):
+    subjects = {'ip': get_remote_address()}
+    subject_type, subject = getattr(g, 'usage_subject', (None, None))
+    if subject_type:
+        subjects[subject_type] = subject
+    usage_meter.record(subjects, usage)
+
+# Opt-in streamed responses of /check and /check-free: each result is sent as soon as it is ready,
+# as one JSON object per line or as Server-Sent Events
+STREAM_FORMATS = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+def requested_stream_format():
+    # ?stream=ndjson|sse, or an Accept header naming one of their content types
+    stream_format = request.args.get('stream')
+    if stream_format is None:
+        accepted = {value for value, _ in request.accept_mimetypes}
+        stream_format = next((name for name, mimetype in STREAM_FORMATS.items() if mimetype in accepted), None)
+    return stream_format
+
+# In NDJSON the done and error lines are told apart from results by their "event" key
+def format_stream_event(stream_format, event, data):
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps(data if event == 'result' else {'event': event, **data}) + "\n"
+
+# Stored fact checks go out first, new checks as they finish (every result has its sentence's id),
+# then a final "done" event with the count. New checks are saved in one batch when the stream ends.
+def stream_fact_checks(text, stream_format):
+    usage = Counter(requests=1)
+
+    def generate():
+        count = 0
+        try:
+            for result in fact_checker.analyze_text_iter(text, usage=usage, save=True):
+                count += 1
+                yield format_stream_event(stream_format, 'result', result)
+            yield format_stream_event(stream_format, 'done', {'count': count})
+        except Exception as e:
+            logger.error(f"Unexpected error while streaming fact checks: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield format_stream_event(stream_format, 'error', {'error': 'An unexpected error occurred while processing your request.'})
+        finally:
+            record_usage(usage)
+
+    # No caching or proxy buffering, or results would arrive all at once again
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[stream_format],
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Used for rate limiting for free users in the route /check-free, describes the FREE_RATE_LIMITS token buckets
+FREE_RATE_LIMIT_MESSAGE = (
+    f"Rate limit exceeded. Free checks are limited to "
+    f"{describe_rate_limits(parse_rate_limits(APIConfig.FREE_RATE_LIMITS))} per IP address. Please try again later.")
 
 
 @app.errorhandler(429)
 def ratelimit_handler(e):
-    return jsonify(error="Rate limit exceeded. You can make 3 requests per day, with a maximum of 1 per hour. Please try again later."), 429
+    return jsonify(error=FREE_RATE_LIMIT_MESSAGE), 429
 
 
 @app.route('/')
@@ -241,6 +317,8 @@ def callback():
         # Update existing user with Zapier API Auth Key if not set
         user_db.update_user_zapier_api_key(
             generate_api_key(), user_info['sub'])
+    # Forget a "no such user" cached before the account existed or was linked
+    user_db.invalidate_user(auth0_user_id=user_info['sub'])
 
     return redirect("/members")
 
@@ -293,6 +371,7 @@ def webhook():
         if user:
             user_db.update_user_subscription(
                 user['auth0_user_id'], customer_id, subscription_id, status)
+            user_db.invalidate_user(auth0_user_id=user['auth0_user_id'], api_key=user.get('api_key'))
         else:
             print(f"No user found for customer_id: {customer_id}")
 
@@ -401,6 +480,7 @@ def subscription_success():
 
             # Fetch user data from the database
             user = user_db.get_user_by_auth0_id(auth0_user_id)
+            user_db.invalidate_user(auth0_user_id=auth0_user_id, api_key=user.get('api_key') if user else None)
 
             if user:
                 return render_template('members.html',
@@ -434,69 +514,76 @@ def proxy():
         return 'No URL provided', 400
 
     try:
-        response = requests.get(url)
+        response = http_client.get(url, follow_redirects=True)
         excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        headers = [(name, value) for (name, value) in response.raw.headers.items()
+        headers = [(name, value) for (name, value) in response.headers.multi_items()
                    if name.lower() not in excluded_headers]
         #print("meow: ", response.content, headers)
         return Response(response.content, response.status_code, headers)
-    except requests.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
         return str(e), 500
 
-# Initialize FactsDB for Blog Routes Below
-# Initialize FactsDB
-db_uri = "localdb"
-facts_db = FactsDB(db_uri)
+# Readiness probe: 503 until this worker has its FactsDB and FactChecker, so traffic only reaches warm workers.
+# Also reports this worker's MySQL pool saturation and acquire latency.
+@app.route('/healthz')
+def healthz():
+    ready = registry.is_loaded("facts_db") and registry.is_loaded("fact_checker")
+    return jsonify({'status': 'ready' if ready else 'starting',
+                    'user_db_pool': user_db.pool.stats()}), 200 if ready else 503
 
 def generate_slug(sentence):
-    return slugify(sentence)
+    # lancedb and pyarrow come with FactsDB, they are only imported once a route needs them
+    from db.facts_db import FactsDB
+    return FactsDB.make_slug(sentence)
 
 def prepare_fact(fact):
-    if 'vector' in fact:
-        del fact['vector']
-    fact['slug'] = generate_slug(fact['sentence'])
+    # FactsDB read APIs never return the vector column
+    if not fact.get('slug'):
+        fact['slug'] = generate_slug(fact['sentence'])
     return fact
 
 @app.route('/blog')
 def blog():
-    page = int(request.args.get('page', 1))
+    page = max(int(request.args.get('page', 1)), 1)
     per_page = 10
-    all_facts = facts_db.get_all_facts()
-    
-    # Reverse the order of facts to show newest first
-    all_facts.reverse()
-    
-    start = (page - 1) * per_page
-    end = start + per_page
-    facts_page = [prepare_fact(fact) for fact in all_facts[start:end]]
-    total_pages = (len(all_facts) - 1) // per_page + 1
+    total_facts = facts_db.count_facts()
+
+    # Newest first, only the requested page is read from the database
+    facts_page = [prepare_fact(fact) for fact in
+                  facts_db.list_facts(offset=(page - 1) * per_page, limit=per_page, order='newest')]
+    total_pages = (total_facts - 1) // per_page + 1
     
     return render_template('blog.html',
                            facts=facts_page,
-                           total_facts=len(all_facts),
+                           total_facts=total_facts,
                            current_page=page,
                            total_pages=total_pages)
 
 @app.route('/api/facts')
 def get_facts():
-    page = int(request.args.get('page', 1))
+    page = max(int(request.args.get('page', 1)), 1)
     per_page = int(request.args.get('per_page', 10))
-    all_facts = facts_db.get_all_facts()
     start = (page - 1) * per_page
     end = start + per_page
     
-    facts_page = [prepare_fact(fact) for fact in all_facts[start:end]]
+    facts_page = [prepare_fact(fact) for fact in
+                  facts_db.list_facts(offset=start, limit=per_page, order='oldest')]
     
     return jsonify({
         'facts': facts_page,
-        'has_more': end < len(all_facts)
+        'has_more': end < facts_db.count_facts()
     })
 
 @app.route('/search')
 def search_facts():
     query = request.args.get('query', '')
     limit = int(request.args.get('limit', 10))
-    results = facts_db.search_facts(query, limit)
+    # auto, hybrid, fts or vector, see FactsDB.search_facts
+    mode = request.args.get('mode', 'auto')
+    from db.facts_db import FactsDB
+    if mode not in FactsDB.search_modes:
+        return f"Invalid search mode '{mode}'", 400
+    results = facts_db.search_facts(query, limit, mode=mode)
     
     prepared_results = [prepare_fact(fact) for fact in results]
     
@@ -509,12 +596,42 @@ def search_facts():
 
 @app.route('/article/<string:slug>')
 def article(slug):
-    all_facts = facts_db.get_all_facts()
-    fact = next((prepare_fact(f) for f in all_facts if generate_slug(f['sentence']) == slug), None)
+    fact = facts_db.get_fact_by_slug(slug)
     if fact is None:
         abort(404)
+    fact = prepare_fact(fact)
     return render_template('article.html', fact=fact)
 
+# Rebuilds the consolidated fact_checks.json from the append-only journal: flask --app app export-facts
+@app.cli.command('export-facts')
+@click.option('--output', default=APIConfig.FACT_JSON_PATH, show_default=True, help='Path of the JSON file to write.')
+def export_facts(output):
+    # Only the journal is needed, not the FactChecker with its API clients and facts DB
+    from db.fact_journal import FactJournal
+    journal = FactJournal(APIConfig.FACT_JOURNAL_PATH, legacy_json_path=APIConfig.FACT_JSON_PATH)
+    count = journal.export(output)
+    click.echo(f"Exported {count} fact checks to {output}")
+
+# Compacts the facts table, prunes old versions and refreshes its indexes: flask --app app maintain-db
+@app.cli.command('maintain-db')
+@click.option('--retention-hours', type=float, default=APIConfig.DB_VERSION_RETENTION_HOURS, show_default=True,
+              help='Keep table versions newer than this.')
+def maintain_db(retention_hours):
+    from datetime import timedelta
+    from db.maintenance import format_report, maintain
+    report = maintain(facts_db, retention=timedelta(hours=retention_hours))
+    click.echo(format_report(report))
+    click.echo(f"Compaction removed {report['fragments_removed']} fragments and added {report['fragments_added']}, "
+               f"cleanup removed {report['versions_removed']} versions ({report['bytes_removed']} bytes)")
+
+# Recomputes every stored vector with the configured embedder, e.g. after switching
+# EMBEDDING_BACKEND to onnx-int8. Stop the app first: flask --app app reembed-db
+@app.cli.command('reembed-db')
+def reembed_db():
+    from db.facts_db import FactsDB
+    db = FactsDB(db_uri=APIConfig.FACTS_DB_URI, reembed=True)
+    click.echo(f"Re-embedded {db.count_facts()} facts into the '{db.embedder.vector_space}' vector space")
+
 # Used for meme2txt_processor
 @app.route('/meme2txt', methods=['POST'])
 def meme2txt():
@@ -528,7 +645,7 @@ def meme2txt():
     
     if image_file:
         try:
-            result = Meme2TxtProcessor.extract_text(image_file)
+            result = registry.get("meme2txt").extract_text(image_file)
             return jsonify({'result': result})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -537,6 +654,7 @@ def meme2txt():
         
 if __name__ == '__main__':
     try:
+        import nltk
         nltk.download('punkt', quiet=False)
         nltk.download('punkt_tab', quiet=False)
 
@@ -1,3 +1,86 @@
+import os
+
+
 class APIConfig:
     SIMILARITY_THRESHOLD = 0.8
     OPENAI_MODEL = "gpt-4o-mini"
+    # LanceDB directory holding the facts table and its indexes
+    FACTS_DB_URI = os.getenv("FACTS_DB_URI", "./localdb")
+
+    # Max sentences fact-checked in parallel per process (1 = sequential)
+    MAX_CONCURRENT_CHECKS = int(os.getenv("MAX_CONCURRENT_CHECKS", 8))
+    # Searches and page fetches in flight per process, shared by all sentences
+    MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", 32))
+    # Seconds a sentence may spend gathering search results and page content before the LLM call
+    EVIDENCE_DEADLINE = float(os.getenv("EVIDENCE_DEADLINE", 20))
+    # Embedding model and how it runs: sentence-transformers (PyTorch), onnx or onnx-int8 (ONNX Runtime).
+    # onnx-int8 vectors aren't matched against the others', a table stored with either refuses it
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+    # ONNX Runtime intra-op threads per process (0 = one per core)
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))
+    # Unix socket of the shared embedding server (python -m db.embedding_server), empty = embed in-process
+    EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+    # Server micro-batches: run once this many sentences are queued or the oldest waited this long
+    EMBEDDING_SERVER_MAX_BATCH = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", 64))
+    EMBEDDING_SERVER_MAX_WAIT_MS = float(os.getenv("EMBEDDING_SERVER_MAX_WAIT_MS", 5))
+    # Client side, in seconds: per-request socket timeout, and how long to embed in-process after a failure
+    EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", 10))
+    EMBEDDING_SERVER_RETRY_INTERVAL = float(os.getenv("EMBEDDING_SERVER_RETRY_INTERVAL", 30))
+    # Sentence embeddings kept in memory so a request's sentences are embedded only once
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+
+    # Shared HTTP client pool (tools/http_client.py), timeouts in seconds
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 40))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 6))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 15))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", 10))
+
+    # Local caches (page content, search results), shared by all workers on the host
+    CACHE_DIR = os.getenv("CACHE_DIR", "./cache")
+    # Extracted page text, TTLs in seconds
+    CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", 7 * 24 * 3600))
+    CONTENT_CACHE_NEGATIVE_TTL = int(os.getenv("CONTENT_CACHE_NEGATIVE_TTL", 6 * 3600))
+    CONTENT_CACHE_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    # Search results, TTLs in seconds (news goes stale much faster than web results)
+    WEB_SEARCH_CACHE_TTL = int(os.getenv("WEB_SEARCH_CACHE_TTL", 24 * 3600))
+    NEWS_SEARCH_CACHE_TTL = int(os.getenv("NEWS_SEARCH_CACHE_TTL", 3 * 3600))
+    SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+    # Fact check archive: append-only journal, and the consolidated JSON `flask export-facts` writes
+    FACT_JOURNAL_PATH = os.getenv("FACT_JOURNAL_PATH", "fact_checks.jsonl")
+    FACT_JSON_PATH = os.getenv("FACT_JSON_PATH", "fact_checks.json")
+    FACT_JOURNAL_FSYNC_EVERY = int(os.getenv("FACT_JOURNAL_FSYNC_EVERY", 20))
+    FACT_JOURNAL_FSYNC_INTERVAL = float(os.getenv("FACT_JOURNAL_FSYNC_INTERVAL", 1.0))
+
+    # IVF-PQ index on the facts table: built once it holds VECTOR_INDEX_MIN_ROWS facts (brute force
+    # is fast enough below that), refreshed after every VECTOR_INDEX_REFRESH_ROWS new facts
+    VECTOR_INDEX_MIN_ROWS = int(os.getenv("VECTOR_INDEX_MIN_ROWS", 10000))
+    VECTOR_INDEX_REFRESH_ROWS = int(os.getenv("VECTOR_INDEX_REFRESH_ROWS", 1000))
+    # Facts added between two reads of the vector index stats by a worker (they decide the two above)
+    VECTOR_INDEX_CHECK_ROWS = int(os.getenv("VECTOR_INDEX_CHECK_ROWS", 100))
+    # Partitions probed per query, and candidates re-ranked on full vectors (k * factor, 0 = off)
+    VECTOR_NPROBES = int(os.getenv("VECTOR_NPROBES", 20))
+    VECTOR_REFINE_FACTOR = int(os.getenv("VECTOR_REFINE_FACTOR", 10))
+    # Full-text (BM25) indexes on sentence and explanation, new facts are added once this many are missing
+    FTS_INDEX_REFRESH_ROWS = int(os.getenv("FTS_INDEX_REFRESH_ROWS", 200))
+    # /search queries of at most this many words (or quoted) are keyword searches, no embedding needed
+    SEARCH_KEYWORD_MAX_TERMS = int(os.getenv("SEARCH_KEYWORD_MAX_TERMS", 2))
+
+    # Lance store upkeep (db/maintenance.py): versions kept for this long, and the background run
+    # interval in seconds (0 = only via `flask maintain-db`)
+    DB_VERSION_RETENTION_HOURS = float(os.getenv("DB_VERSION_RETENTION_HOURS", 24))
+    DB_MAINTENANCE_INTERVAL = float(os.getenv("DB_MAINTENANCE_INTERVAL", 0))
+    # Seconds before a worker's table handle checks for versions written by other processes
+    DB_READ_CONSISTENCY_INTERVAL = float(os.getenv("DB_READ_CONSISTENCY_INTERVAL", 5))
+
+    # Seconds between bulk writes of each worker's usage counts to the MySQL usage table
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", 30))
+    # Token buckets shared by the workers on the host, as "requests/seconds" rules separated by commas:
+    # /check-free per IP, and /check per account (empty = unlimited)
+    FREE_RATE_LIMITS = os.getenv("FREE_RATE_LIMITS", "5/60,15/86400")
+    PAID_RATE_LIMITS = os.getenv("PAID_RATE_LIMITS", "")
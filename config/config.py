@@ -22,6 +22,19 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD')
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE')
     MYSQL_PORT = int(25060)
+    # Per-process connection pool: connections kept open, seconds a query waits for a free one
+    # before failing, and idle seconds after which a connection is pinged before reuse
+    MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 4))
+    MYSQL_POOL_MAX_WAIT = float(os.getenv('MYSQL_POOL_MAX_WAIT', 2))
+    MYSQL_POOL_PING_AFTER = float(os.getenv('MYSQL_POOL_PING_AFTER', 30))
+    # Seconds to open a connection, and how long to fail fast after that failed before trying again
+    MYSQL_CONNECT_TIMEOUT = int(os.getenv('MYSQL_CONNECT_TIMEOUT', 5))
+    MYSQL_RETRY_INTERVAL = float(os.getenv('MYSQL_RETRY_INTERVAL', 5))
+    # Per-process cache of the subscription lookup behind paid requests: users cached, and seconds
+    # an entry is kept (a subscription change reaches other workers within this), or for unknown keys
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+    USER_CACHE_NEGATIVE_TTL = float(os.getenv('USER_CACHE_NEGATIVE_TTL', 10))
 
     # Flask configuration
     SECRET_KEY = os.getenv('APP_SECRET_KEY')
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+from tools.logger import logger
+
+
+class DatabaseUnavailable(Exception):
+    """No MySQL connection could be had in time: the pool stayed full, or MySQL can't be reached."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections shared by every thread of a process.
+
+    At most `size` connections are open. A thread that finds them all in use waits up to
+    `max_wait` seconds for one to come back, then gets DatabaseUnavailable instead of queueing
+    forever. Connections idle for more than `ping_after` seconds are pinged before reuse and
+    replaced if the server dropped them. Whatever transaction a caller leaves open is rolled back
+    on release, and connections that failed with a connection error are closed instead. After a failed connect, new connects
+    fail straight away for `retry_interval` seconds rather than each waiting out the timeout.
+    """
+
+    # Acquire latencies kept for the percentiles in stats()
+    latency_window = 1000
+
+    def __init__(self, config: dict, size: int, max_wait: float, ping_after: float,
+                 connect_timeout: int, retry_interval: float):
+        self.config = dict(config, connect_timeout=connect_timeout)
+        self.size = size
+        self.max_wait = max_wait
+        self.ping_after = ping_after
+        self.retry_interval = retry_interval
+        self._reset()
+        # Connections inherited from the parent must not be shared with forked workers
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._condition = threading.Condition()
+        # (connection, time it was returned), most recently used last
+        self._idle = deque()
+        self._open = 0
+        self._waiting = 0
+        self._down_until = 0
+        self._latencies = deque(maxlen=self.latency_window)
+        self._counters = {"acquired": 0, "waited": 0, "timeouts": 0, "connect_errors": 0, "stale": 0, "discarded": 0}
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        except (mysql.connector.OperationalError, mysql.connector.InterfaceError):
+            # The connection was lost or is unusable, it isn't handed out again
+            self._discard(conn)
+            raise
+        except BaseException:
+            self._release(conn)
+            raise
+        self._release(conn)
+
+    def _acquire(self):
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        conn = None
+        waited = False
+        with self._condition:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    # Claim the slot now, connect outside the lock
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    logger.warning(f"MySQL connection pool exhausted, gave up after {self.max_wait}s")
+                    raise DatabaseUnavailable(
+                        f"No MySQL connection free after {self.max_wait}s ({self.size} in use)")
+                if not waited:
+                    self._counters["waited"] += 1
+                    waited = True
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            if conn is not None and time.monotonic() - returned_at > self.ping_after and not self._is_alive(conn):
+                self._count("stale")
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except DatabaseUnavailable:
+            self._discard_slot()
+            raise
+
+        latency = time.monotonic() - start
+        with self._condition:
+            self._counters["acquired"] += 1
+            self._latencies.append(latency)
+        return conn
+
+    def _connect(self):
+        if time.monotonic() < self._down_until:
+            raise DatabaseUnavailable("MySQL unreachable, not retrying yet")
+        try:
+            return mysql.connector.connect(**self.config)
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection error: {err}")
+            with self._condition:
+                self._counters["connect_errors"] += 1
+                self._down_until = time.monotonic() + self.retry_interval
+            raise DatabaseUnavailable(f"Cannot connect to MySQL: {err}") from err
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _release(self, conn):
+        try:
+            # Without autocommit even a SELECT opens a transaction, whose snapshot would hide
+            # later writes from the next user, so anything left open is rolled back
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding MySQL connection: {e}")
+            self._discard(conn)
+            return
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, conn):
+        self._close(conn)
+        self._count("discarded")
+        self._discard_slot()
+
+    def _count(self, name):
+        with self._condition:
+            self._counters[name] += 1
+
+    def _discard_slot(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        """Pool occupancy, counters since start and acquire latency over the last latency_window acquires."""
+        with self._condition:
+            latencies = sorted(self._latencies)
+            idle = len(self._idle)
+            stats = {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._open - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "saturation": round((self._open - idle) / self.size, 2),
+                **self._counters,
+            }
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else 0
+
+        stats["acquire_ms"] = {"p50": percentile(0.5), "p99": percentile(0.99), "max": percentile(1)}
+        return stats
@@ -0,0 +1,253 @@
+"""
+Local embedding server shared by every web worker on the host, over a Unix socket.
+
+One process holds the model instead of one copy per worker, and sentences sent by different
+workers at about the same time are embedded together in micro-batches: a batch is run once it
+holds EMBEDDING_SERVER_MAX_BATCH sentences or its first request has waited
+EMBEDDING_SERVER_MAX_WAIT_MS. Start it before the workers:
+
+    python -m db.embedding_server --socket /run/factcheck/embeddings.sock
+
+and set EMBEDDING_SERVER_SOCKET to the same path. Workers embed in-process while it is down.
+
+Wire format, both directions: a 1-byte status (0 ok, 1 error) in responses only, then a 4-byte
+big-endian length and the payload. Requests are JSON ({"op": "info"} or {"op": "embed",
+"sentences": [...]}). Embed responses are the vectors as raw little-endian float32, row by row;
+info and error responses are JSON.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+import numpy as np
+
+from config.api_config import APIConfig
+from db.embeddings import Embedder, create_embedder
+from tools.logger import logger
+
+OK, ERROR = 0, 1
+_LENGTH = struct.Struct(">I")
+
+
+class EmbeddingServerUnavailable(Exception):
+    """The embedding server can't be reached or the connection broke, as opposed to an error it replied with."""
+
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def _send_message(sock, payload, status=None):
+    header = _LENGTH.pack(len(payload)) if status is None else bytes([status]) + _LENGTH.pack(len(payload))
+    sock.sendall(header + payload)
+
+
+def _recv_message(sock, with_status=False):
+    status = _recv_exactly(sock, 1)[0] if with_status else None
+    payload = _recv_exactly(sock, _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))[0])
+    return (status, payload) if with_status else payload
+
+
+class MicroBatcher:
+    """Queues embed requests from many connections and runs them through the model together."""
+
+    def __init__(self, embedder: Embedder, max_batch: int, max_wait: float):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def submit(self, sentences: List[str]) -> Future:
+        future = Future()
+        self._queue.put((sentences, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[0])
+            try:
+                vectors = np.asarray(self.embedder.embed(
+                    [s for sentences, _ in pending for s in sentences]), dtype='<f4')
+            except Exception as e:
+                logger.error(f"Embedding batch of {size} sentences failed: {str(e)}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for sentences, future in pending:
+                future.set_result(vectors[start:start + len(sentences)])
+                start += len(sentences)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A worker keeps its connection open and sends requests one after another
+        while True:
+            try:
+                request = json.loads(_recv_message(self.request))
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                _send_message(self.request, json.dumps({"error": str(e)}).encode(), ERROR)
+                continue
+            try:
+                if request.get("op") == "info":
+                    embedder = self.server.batcher.embedder
+                    _send_message(self.request, json.dumps(
+                        {"ndims": embedder.ndims, "vector_space": embedder.vector_space}).encode(), OK)
+                else:
+                    vectors = self.server.batcher.submit(list(request["sentences"])).result()
+                    _send_message(self.request, vectors.tobytes(), OK)
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                _send_message(self.request, json.dumps({"error": str(e)}).encode(), ERROR)
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Every thread of every worker connects, the default backlog of 5 refuses bursts of them
+    request_queue_size = 256
+
+    def __init__(self, socket_path: str, embedder: Embedder, max_batch: int, max_wait: float):
+        self.batcher = MicroBatcher(embedder, max_batch, max_wait)
+        if os.path.exists(socket_path):
+            # Left behind by a server that didn't shut down cleanly
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+
+
+class EmbeddingClient(Embedder):
+    """
+    Embedder that sends sentences to the embedding server.
+
+    Each thread of each process keeps its own connection. When the socket can't be reached the
+    fallback (an in-process embedder, created on first need) is used instead, and the server is
+    tried again after EMBEDDING_SERVER_RETRY_INTERVAL seconds. The fallback must embed into the
+    server's vector space, or the two would fill one table with vectors that don't compare.
+    """
+
+    def __init__(self, socket_path: str, fallback: Callable[[], Embedder]):
+        self.socket_path = socket_path
+        self._fallback_factory = fallback
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._local = threading.local()
+        self._retry_at = 0
+        try:
+            info = json.loads(self._request({"op": "info"}))
+            self.ndims, self.vector_space = info["ndims"], info["vector_space"]
+        except EmbeddingServerUnavailable as e:
+            self._server_unavailable(e)
+            self.ndims, self.vector_space = self.fallback.ndims, self.fallback.vector_space
+
+    @property
+    def fallback(self) -> Embedder:
+        if self._fallback is None:
+            with self._fallback_lock:
+                if self._fallback is None:
+                    fallback = self._fallback_factory()
+                    if getattr(self, "vector_space", fallback.vector_space) != fallback.vector_space:
+                        raise ValueError(
+                            f"The in-process embedder's vectors ({fallback.vector_space}) don't match the "
+                            f"embedding server's ({self.vector_space}), set the same EMBEDDING_BACKEND for both")
+                    self._fallback = fallback
+        return self._fallback
+
+    def _connection(self):
+        # Sockets must not be shared with forked children, reconnect in each process
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or self._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(APIConfig.EMBEDDING_SERVER_TIMEOUT)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def _request(self, request: dict) -> bytes:
+        """Send one request. Errors the server replies with raise ValueError, they are not retried in-process."""
+        try:
+            sock = self._connection()
+        except OSError as e:
+            raise EmbeddingServerUnavailable(str(e)) from e
+        try:
+            _send_message(sock, json.dumps(request).encode())
+            status, payload = _recv_message(sock, with_status=True)
+        except (OSError, ConnectionError) as e:
+            # The stream may be mid-message, it can't be reused
+            sock.close()
+            self._local.sock = None
+            raise EmbeddingServerUnavailable(str(e)) from e
+        if status != OK:
+            raise ValueError(json.loads(payload).get("error", "Embedding server error"))
+        return payload
+
+    def _server_unavailable(self, error):
+        logger.warning(f"Embedding server at {self.socket_path} unavailable, embedding in-process: {error}")
+        self._retry_at = time.monotonic() + APIConfig.EMBEDDING_SERVER_RETRY_INTERVAL
+
+    def embed(self, sentences):
+        if not sentences:
+            return []
+        if time.monotonic() >= self._retry_at:
+            try:
+                payload = self._request({"op": "embed", "sentences": list(sentences)})
+                return np.frombuffer(payload, dtype='<f4').reshape(len(sentences), self.ndims).tolist()
+            except EmbeddingServerUnavailable as e:
+                self._server_unavailable(e)
+        return self.fallback.embed(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve sentence embeddings to the web workers over a Unix socket.")
+    parser.add_argument('--socket', default=APIConfig.EMBEDDING_SERVER_SOCKET, required=not APIConfig.EMBEDDING_SERVER_SOCKET,
+                        help="Socket path (default: EMBEDDING_SERVER_SOCKET)")
+    parser.add_argument('--max-batch', type=int, default=APIConfig.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=APIConfig.EMBEDDING_SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    embedder = create_embedder()
+    embedder.embed(["warmup"])
+    with EmbeddingServer(args.socket, embedder, args.max_batch, args.max_wait_ms / 1000) as server:
+        logger.info(f"Embedding server listening on {args.socket} "
+                    f"(batches of up to {args.max_batch}, {args.max_wait_ms}ms max wait)")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
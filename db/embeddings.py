@@ -0,0 +1,166 @@
+import abc
+import fcntl
+import json
+import os
+import threading
+from typing import List
+
+import numpy as np
+
+from config.api_config import APIConfig
+from tools.logger import logger
+
+
+class Embedder(abc.ABC):
+    """
+    Turns sentences into unit-length vectors with one batched call.
+
+    Every backend pools and normalizes like bge-small under sentence-transformers (CLS token,
+    L2 norm), but their vectors are only assumed comparable within one vector_space (see
+    vector_space()). FactsDB refuses an embedder whose space differs from its stored vectors'
+    until the table is re-embedded (`flask --app app reembed-db`).
+    """
+
+    ndims: int
+    vector_space: str
+
+    @abc.abstractmethod
+    def embed(self, sentences: List[str]) -> List[List[float]]:
+        ...
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """PyTorch through sentence-transformers, what LanceDB's registry function ran before."""
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 32):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device=device)
+        self.ndims = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+
+    def embed(self, sentences):
+        if not sentences:
+            return []
+        return self.model.encode(list(sentences), batch_size=self.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True).tolist()
+
+
+class OnnxEmbedder(Embedder):
+    """
+    ONNX Runtime on CPU, optionally with int8 weights.
+
+    The fp32 graph is the model repository's onnx/model.onnx. The int8 variant is produced from
+    it once with dynamic quantization and kept in CACHE_DIR/models. Pooling and normalization
+    follow the sentence-transformers config of bge (CLS token, L2 norm).
+
+    The inference session starts ONNX Runtime's thread pools, so it is created in each process
+    on first use rather than here, where it could end up in gunicorn's master before the fork.
+    """
+
+    def __init__(self, model_name: str, quantized: bool = False, batch_size: int = 32,
+                 max_length: int = 512, threads: int = 0):
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        model_path = hf_hub_download(model_name, "onnx/model.onnx")
+        if quantized:
+            model_path = self._quantized_model(model_path, model_name)
+        self.model_path = model_path
+        self.threads = threads
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        with open(hf_hub_download(model_name, "config.json")) as f:
+            self.ndims = json.load(f)["hidden_size"]
+        self.batch_size = batch_size
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    import onnxruntime
+                    options = onnxruntime.SessionOptions()
+                    if self.threads:
+                        options.intra_op_num_threads = self.threads
+                    self._session = onnxruntime.InferenceSession(
+                        self.model_path, options, providers=["CPUExecutionProvider"])
+                    self.input_names = {node.name for node in self._session.get_inputs()}
+                    self._session_pid = os.getpid()
+        return self._session
+
+    @staticmethod
+    def _quantized_model(model_path, model_name):
+        directory = os.path.join(APIConfig.CACHE_DIR, "models")
+        quantized_path = os.path.join(directory, f"{model_name.replace('/', '--')}-int8.onnx")
+        if os.path.exists(quantized_path):
+            return quantized_path
+        os.makedirs(directory, exist_ok=True)
+        # Workers starting together quantize once, the others wait and reuse the file
+        with open(f"{quantized_path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(quantized_path):
+                    from onnxruntime.quantization import QuantType, quantize_dynamic
+                    logger.info(f"Quantizing {model_name} to int8 at {quantized_path}")
+                    tmp_path = f"{quantized_path}.tmp.onnx"
+                    quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QInt8)
+                    os.replace(tmp_path, quantized_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return quantized_path
+
+    def embed(self, sentences):
+        if not sentences:
+            return []
+        # Similar lengths share a batch so little time goes into padding, results keep the input order
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+        vectors = np.empty((len(sentences), self.ndims), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in batch])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            session = self.session
+            hidden = session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+            cls = hidden[:, 0]
+            vectors[batch] = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+        return vectors.tolist()
+
+
+# EMBEDDING_BACKEND values
+BACKENDS = {
+    "sentence-transformers": lambda model_name: SentenceTransformerEmbedder(
+        model_name, batch_size=APIConfig.EMBEDDING_BATCH_SIZE),
+    "onnx": lambda model_name: OnnxEmbedder(
+        model_name, batch_size=APIConfig.EMBEDDING_BATCH_SIZE, threads=APIConfig.EMBEDDING_THREADS),
+    "onnx-int8": lambda model_name: OnnxEmbedder(
+        model_name, quantized=True, batch_size=APIConfig.EMBEDDING_BATCH_SIZE, threads=APIConfig.EMBEDDING_THREADS),
+}
+
+
+def vector_space(backend: str, model_name: str) -> str:
+    """
+    Name of the space a backend's vectors are in, only vectors of one space are compared against
+    SIMILARITY_THRESHOLD. sentence-transformers and onnx run the same fp32 weights. int8
+    quantization moves the vectors by an amount that hasn't been measured against the threshold
+    (perf/embedding_benchmark.py does), so onnx-int8 is a space of its own.
+    """
+    return f"{model_name}:int8" if backend == "onnx-int8" else model_name
+
+
+def create_embedder(backend: str = None, model_name: str = None) -> Embedder:
+    backend = backend or APIConfig.EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+    model_name = model_name or APIConfig.EMBEDDING_MODEL
+    logger.info(f"Loading {model_name} with the {backend} backend")
+    embedder = BACKENDS[backend](model_name)
+    embedder.vector_space = vector_space(backend, model_name)
+    return embedder
@@ -0,0 +1,140 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from tools.logger import logger
+
+
+class FactJournal:
+    """
+    Append-only JSON Lines archive of every saved fact check.
+
+    Replaces rewriting the whole fact_checks.json on each save: a record is a single write on
+    an O_APPEND descriptor, so workers appending at the same time never clobber each other.
+    fsync is batched, after fsync_every records or once fsync_interval seconds have passed; a
+    timer syncs whatever is still pending then, so records are durable within fsync_interval
+    even when no further append comes along.
+    `export` produces the consolidated JSON array when one is needed.
+    """
+
+    def __init__(self, path: str, legacy_json_path: str = None, fsync_every: int = 20, fsync_interval: float = 1.0):
+        self.path = path
+        self.legacy_json_path = legacy_json_path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+        self._seed_from_legacy_json()
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _file_lock(self):
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _seed_from_legacy_json(self):
+        # One-off: start the journal from the existing fact_checks.json so exports stay complete
+        if not self.legacy_json_path or os.path.exists(self.path):
+            return
+        with self._file_lock():
+            if os.path.exists(self.path) or not os.path.exists(self.legacy_json_path):
+                return
+            try:
+                with open(self.legacy_json_path) as f:
+                    records = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not read {self.legacy_json_path} to seed the fact journal: {e}")
+                return
+            if not isinstance(records, list):
+                records = []
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            logger.info(f"Seeded {self.path} with {len(records)} fact checks from {self.legacy_json_path}")
+
+    def _open(self):
+        # Descriptors don't survive a fork usefully, each worker opens its own
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+            # Neither is the parent's timer thread
+            self._timer = None
+        return self._fd
+
+    def append_many(self, records: Iterable[dict]):
+        data = ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+        if not data:
+            return
+        with self._lock:
+            fd = self._open()
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            self._pending += data.count(b'\n')
+            since_sync = time.monotonic() - self._last_sync
+            if self._pending >= self.fsync_every or since_sync >= self.fsync_interval:
+                self._sync()
+            elif self._timer is None:
+                # Traffic may stop here, the records pending are synced when the interval is up
+                self._timer = threading.Timer(self.fsync_interval - since_sync, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append(self, record: dict):
+        self.append_many([record])
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            if self._pending and self._fd is not None and self._pid == os.getpid():
+                self._sync()
+
+    def records(self) -> Iterator[dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave one torn line, skip it rather than fail the export
+                    logger.warning(f"Skipping unreadable line {line_number} in {self.path}")
+
+    def export(self, json_path: str) -> int:
+        """Write every journaled fact check to json_path as one JSON array, atomically."""
+        self.flush()
+        tmp_path = f"{json_path}.tmp"
+        count = 0
+        with open(tmp_path, 'w') as f:
+            f.write('[')
+            for record in self.records():
+                f.write((',\n' if count else '\n') + json.dumps(record, indent=2))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+        os.replace(tmp_path, json_path)
+        return count
@@ -1,90 +1,584 @@
 import lancedb
-from lancedb.embeddings import get_registry
+import pyarrow as pa
+import pyarrow.compute as pc
 from lancedb.pydantic import LanceModel, Vector
 import json
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import List, Optional
+import fcntl
 import os
+import re
+import threading
+from contextlib import contextmanager
 
+from cachetools import LRUCache
+from slugify import slugify
+
+from tools import registry
 from tools.logger import logger
 from config.api_config import APIConfig
+from db.embeddings import vector_space
+from db.sentence_index import SentenceIndex, sentence_key
 
 
 class FactsDB:
 
     facts_table_name = "facts_checked"
-    transformer_model_name = "BAAI/bge-small-en-v1.5"
+    # Scratch table a schema migration is streamed through before it replaces facts_checked
+    migration_table_name = "facts_checked_migration"
+    migration_batch_size = 1024
+    slug_pattern = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+    fts_columns = ["sentence", "explanation"]
+    search_modes = ("auto", "hybrid", "fts", "vector")
+    # Reciprocal rank fusion constant, damps the weight of the very top ranks
+    rrf_k = 60
+
+    # How to fill columns added to FactChecked for rows stored before they existed,
+    # from the old row and its position in the table
+    column_backfills = {
+        "slug": lambda row, position: FactsDB.make_slug(row["sentence"]),
+        "seq": lambda row, position: position,
+    }
 
-    def __init__(self, db_uri: str):
+    def __init__(self, db_uri: str, reembed: bool = False):
         logger.debug(f"Connecting to database at '{db_uri}'")
-        self.db = lancedb.connect(db_uri)
-        self.model = self._initialize_model()
+        self.db_uri = db_uri
+        # Other workers append and maintenance compacts, so handles must pick up newer versions
+        self.db = lancedb.connect(
+            db_uri, read_consistency_interval=timedelta(seconds=APIConfig.DB_READ_CONSISTENCY_INTERVAL))
+        self.embedder = self._initialize_embedder()
+        # Recently computed vectors by sentence, so lookup, dedup and insert share one model call
+        self._embedding_cache = LRUCache(maxsize=APIConfig.EMBEDDING_CACHE_SIZE)
+        self._embedding_lock = threading.Lock()
         self.FactChecked = self._create_fact_checked_model()
-        self.table = self.create_or_migrate_table()
+        self.vector_space_path = os.path.join(db_uri, "vector_space.json")
+        self.seq_state_path = os.path.join(db_uri, "seq.json")
+        # (table version, row positions sorted by seq) of the last list_facts call
+        self._seq_order = None
+        # Table size when this worker last read the vector index stats, see _update_vector_index
+        self._vector_index_checked_rows = None
+        self.table = self.create_or_migrate_table(reembed=reembed)
+        self.sentence_index = SentenceIndex(os.path.join(db_uri, "sentence_index.sqlite"))
+        self._backfill_sentence_index()
+        # One-off for tables that predate the full-text indexes, later writes only fold new rows in
+        if self._missing_fts_columns():
+            with self.index_lock():
+                self.table.checkout_latest()
+                self._ensure_fts_indexes()
 
-    def _initialize_model(self):
-        return get_registry().get("sentence-transformers").create(name=self.transformer_model_name, device="cpu")
+    def _initialize_embedder(self):
+        # Shared through the registry so weights warmed up before a fork aren't loaded again.
+        # Vectors are always computed here and passed in, the table has no embedding function.
+        return registry.get("embedder")
 
     def _create_fact_checked_model(self):
         class FactChecked(LanceModel):
-            sentence: str = self.model.SourceField()
+            sentence: str
             explanation: str
             rating: str
             severity: str
             key_points: List[str]
             source: List[str] = []
             check_date: Optional[date] = None
-            vector: Vector(self.model.ndims()) = self.model.VectorField()
+            slug: str = ""
+            # Insertion order, allocated by _allocate_seq, list_facts pages by it
+            seq: int = 0
+            vector: Vector(self.embedder.ndims)
         return FactChecked
 
-    def create_or_migrate_table(self):
-        if self.facts_table_name in self.db.table_names():
-            old_table = self.db.open_table(self.facts_table_name)
-            if set(old_table.schema.names) != set(self.FactChecked.model_fields.keys()):
-                logger.debug("Migrating existing table to new schema...")
-                self.db.drop_table(self.facts_table_name)
-                return self.create_new_table()
+    @contextmanager
+    def _exclusive(self, name):
+        # Held across every worker on the host while one of them rewrites shared files
+        os.makedirs(self.db_uri, exist_ok=True)
+        with open(os.path.join(self.db_uri, f"{name}.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def index_lock(self):
+        """
+        Context manager held while the table's indexes are built or its files rewritten (compaction):
+        those commits conflict with each other, so one worker on the host does them at a time.
+        """
+        return self._exclusive("indexes")
+
+    def create_or_migrate_table(self, reembed: bool = False):
+        # Workers starting together must not migrate the same table at once
+        with self._exclusive("schema"):
+            self._drop_migration_table()
+            if self.facts_table_name in self.db.table_names():
+                old_table = self.db.open_table(self.facts_table_name)
+                if reembed:
+                    logger.debug(f"Re-embedding existing table into '{self.embedder.vector_space}'...")
+                    table = self.migrate_table(old_table, reembed=True)
+                elif set(old_table.schema.names) != set(self.FactChecked.model_fields.keys()):
+                    logger.debug("Migrating existing table to new schema...")
+                    table = self.migrate_table(old_table)
+                else:
+                    logger.debug("Using existing table.")
+                    table = old_table
             else:
-                logger.debug("Using existing table.")
-                return old_table
-        else:
-            logger.debug("Creating new empty table.")
-            return self.create_new_table()
+                logger.debug("Creating new empty table.")
+                table = self.create_new_table()
+            self._check_vector_space(table)
+            self._ensure_scalar_index(table, "slug")
+        return table
+
+    def _check_vector_space(self, table):
+        # Stored vectors are only matched against vectors of the same space (see
+        # db.embeddings.vector_space), so the table records its space and refuses other embedders
+        space = self.embedder.vector_space
+        try:
+            with open(self.vector_space_path) as f:
+                recorded = json.load(f)["vector_space"]
+        except (OSError, ValueError, KeyError):
+            recorded = None
+        if table.count_rows() > 0:
+            # Facts stored before the space was recorded were embedded by sentence-transformers
+            stored = recorded or vector_space("sentence-transformers", APIConfig.EMBEDDING_MODEL)
+            if stored != space:
+                raise ValueError(
+                    f"The facts table holds '{stored}' vectors but the embedder produces '{space}' ones, "
+                    f"set EMBEDDING_BACKEND/EMBEDDING_MODEL to match or re-embed the table with "
+                    f"`flask --app app reembed-db`")
+        if recorded != space:
+            self._record_vector_space(space)
+
+    def _record_vector_space(self, space):
+        tmp_path = f"{self.vector_space_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"vector_space": space}, f)
+        os.replace(tmp_path, self.vector_space_path)
 
     def create_new_table(self):
         return self.db.create_table(self.facts_table_name, schema=self.FactChecked)
 
-    def add_fact_if_not_exists(self, fact):
-        logger.debug(f"Attempting to add new fact: '{fact['sentence']}'")
-        existing_facts = self.table.search(fact["sentence"], query_type="vector").limit(1).to_pandas()
+    def migrate_table(self, old_table, reembed: bool = False):
+        """
+        Rewrite the table in the current FactChecked schema, keeping every row and its stored vector.
+        Dropped columns are discarded, new ones are filled from column_backfills or the field default.
 
-        if len(existing_facts) == 0:
-            self.table.add([fact])
-            logger.debug(f"Added new fact: '{fact['sentence']}'")
-            return True
-        else:
-            existing_fact = existing_facts.iloc[0]
-            similarity = 1 / (1 + existing_fact['_distance'])
-            logger.debug(f"Most similar existing fact: '{existing_fact['sentence']}' with similarity {similarity}")
-
-            if similarity < APIConfig.SIMILARITY_THRESHOLD or fact['sentence'] != existing_fact['sentence']:
-                self.table.add([fact])
-                logger.debug(f"Added new fact: '{fact['sentence']}' (similarity: {similarity})")
-                return True
+        Rows are streamed in batches into a scratch table first, so memory stays flat and a failing
+        conversion leaves facts_checked untouched. The converted batches then replace facts_checked
+        in a single overwrite commit. Stored vectors are copied as-is, the model never runs, unless
+        reembed is set: then each batch's vectors are recomputed by the current embedder and the
+        table is recorded as being in its vector space.
+        """
+        fields = self.FactChecked.model_fields
+        schema = self.FactChecked.to_arrow_schema()
+        self._drop_migration_table()
+        migration_table = None
+        position = 0
+        for batch in old_table.to_lance().to_batches(batch_size=self.migration_batch_size):
+            rows = []
+            for row in batch.to_pylist():
+                new_row = {}
+                for name, field in fields.items():
+                    if name in row:
+                        new_row[name] = row[name]
+                    elif name in self.column_backfills:
+                        new_row[name] = self.column_backfills[name](row, position)
+                    elif not field.is_required():
+                        new_row[name] = field.get_default(call_default_factory=True)
+                    else:
+                        raise ValueError(f"Cannot migrate {self.facts_table_name}: no value for new column '{name}'")
+                rows.append(new_row)
+                position += 1
+            if not rows:
+                continue
+            if reembed:
+                for row, vector in zip(rows, self.embedder.embed([row["sentence"] for row in rows])):
+                    row["vector"] = vector
+            data = pa.Table.from_pylist(rows, schema=schema)
+            if migration_table is None:
+                migration_table = self.db.create_table(self.migration_table_name, data=data, schema=schema)
             else:
-                logger.debug(f"Fact already exists: '{fact['sentence']}' (similarity: {similarity})")
-                return False
+                migration_table.add(data)
+            logger.debug(f"Converted {position} facts to the new schema")
+
+        if migration_table is None:
+            return self.db.create_table(self.facts_table_name, schema=self.FactChecked, mode="overwrite")
+        table = self.db.create_table(
+            self.facts_table_name, schema=schema, mode="overwrite",
+            data=migration_table.to_lance().to_batches(batch_size=self.migration_batch_size))
+        self._drop_migration_table()
+        # The seq counter is recovered from the migrated rows
+        if os.path.exists(self.seq_state_path):
+            os.remove(self.seq_state_path)
+        if reembed:
+            self._record_vector_space(self.embedder.vector_space)
+            logger.info(f"Re-embedded {position} facts into '{self.embedder.vector_space}'")
+        else:
+            logger.info(f"Migrated {position} facts to the new schema")
+        return table
+
+    def _drop_migration_table(self):
+        # Leftover from a migration that was interrupted before the swap
+        if self.migration_table_name in self.db.table_names():
+            logger.debug(f"Dropping stale '{self.migration_table_name}' table")
+            self.db.drop_table(self.migration_table_name)
+
+    @staticmethod
+    def _ensure_scalar_index(table, column):
+        # Scalar indexes can't be trained on an empty table, so this waits for the first facts
+        if table.count_rows() == 0:
+            return
+        if any(index.get("fields") == [column] for index in table.to_lance().list_indices()):
+            return
+        logger.debug(f"Creating scalar index on '{column}'")
+        table.create_scalar_index(column)
+
+    @staticmethod
+    def vector_index_params(num_rows: int, ndims: int) -> dict:
+        # ~sqrt(rows) IVF partitions, and PQ sub-vectors of 8 dimensions (48 for bge-small's 384)
+        return {"num_partitions": max(1, int(num_rows ** 0.5)), "num_sub_vectors": ndims // 8}
+
+    def vector_index_stats(self) -> Optional[dict]:
+        """Indexed and unindexed row counts of the vector index, or None if there is none yet."""
+        dataset = self.table.to_lance()
+        for index in dataset.list_indices():
+            if index.get("fields") == ["vector"]:
+                return dataset.stats.index_stats(index["name"])
+        return None
+
+    def update_indexes(self, force: bool = False):
+        """
+        Keep the table's indexes in step with its growth, called after facts are written.
+
+        The IVF-PQ vector index is built once the table reaches VECTOR_INDEX_MIN_ROWS. After that
+        new rows are folded into it incrementally every VECTOR_INDEX_REFRESH_ROWS. Incremental
+        updates keep the partitions trained on the old rows, so the index is retrained from
+        scratch once it has half the partitions the current size calls for (the table has
+        grown ~4x) or more rows are unindexed than indexed. Its stats are only read once
+        VECTOR_INDEX_CHECK_ROWS facts were added since this worker last looked.
+
+        The full-text indexes take new rows incrementally as well, every FTS_INDEX_REFRESH_ROWS.
+
+        With force (maintenance), the vector index is checked regardless and every fact missing
+        from the full-text indexes is added to them.
+        """
+        with self.index_lock():
+            self.table.checkout_latest()
+            self._ensure_scalar_index(self.table, "slug")
+            self._ensure_fts_indexes()
+            self._update_fts_indexes(force=force)
+            self._update_vector_index(force=force)
+
+    def _update_vector_index(self, force: bool = False):
+        num_rows = self.table.count_rows()
+        if num_rows < APIConfig.VECTOR_INDEX_MIN_ROWS:
+            return
+        # index_stats loads the index metadata, centroids included, too much to read on every write
+        checked_rows = self._vector_index_checked_rows
+        if not force and checked_rows is not None and num_rows - checked_rows < APIConfig.VECTOR_INDEX_CHECK_ROWS:
+            return
+        self._vector_index_checked_rows = num_rows
+        stats = self.vector_index_stats()
+        params = self.vector_index_params(num_rows, self.embedder.ndims)
+        # Only retrain for partitions the stats actually report
+        trained_partitions = stats["indices"][0].get("num_partitions") if stats and stats.get("indices") else None
+        undertrained = trained_partitions is not None and trained_partitions * 2 <= params["num_partitions"]
+        if stats is None or stats["num_unindexed_rows"] > stats["num_indexed_rows"] or undertrained:
+            logger.info(f"Building vector index over {num_rows} facts ({params})")
+            self.table.create_index(metric="L2", vector_column_name="vector", replace=True, **params)
+        elif stats["num_unindexed_rows"] >= APIConfig.VECTOR_INDEX_REFRESH_ROWS:
+            logger.info(f"Adding {stats['num_unindexed_rows']} new facts to the vector index")
+            self.table.to_lance().optimize.optimize_indices()
+
+    def _fts_indices(self, dataset) -> List[dict]:
+        return [index for index in dataset.list_indices()
+                if index["type"] == "Inverted" and index["fields"][0] in self.fts_columns]
+
+    def _missing_fts_columns(self) -> List[str]:
+        if self.table.count_rows() == 0:
+            return []
+        indexed = {index["fields"][0] for index in self._fts_indices(self.table.to_lance())}
+        return [column for column in self.fts_columns if column not in indexed]
+
+    def _ensure_fts_indexes(self):
+        # Lance's own inverted index per column: unlike the tantivy one it can be updated in place
+        # by optimize_indices. Like scalar indexes, it waits for the first facts.
+        for column in self._missing_fts_columns():
+            logger.info(f"Building full-text index on '{column}' over {self.table.count_rows()} facts")
+            # replace also deletes the tantivy index earlier versions built, which searches would prefer
+            self.table.create_fts_index(column, use_tantivy=False, replace=True)
+        legacy_state_path = os.path.join(self.db_uri, "fts_index.json")
+        if os.path.exists(legacy_state_path):
+            os.remove(legacy_state_path)
+
+    def _update_fts_indexes(self, force: bool = False):
+        # The manifest lists the fragments each index covers, so this reads no index data
+        dataset = self.table.to_lance()
+        indices = self._fts_indices(dataset)
+        if not indices:
+            return
+        fragment_rows = {fragment.fragment_id: fragment.count_rows() for fragment in dataset.get_fragments()}
+        unindexed = max(sum(rows for fragment_id, rows in fragment_rows.items()
+                            if fragment_id not in index["fragment_ids"]) for index in indices)
+        if unindexed >= (1 if force else APIConfig.FTS_INDEX_REFRESH_ROWS):
+            logger.info(f"Adding {unindexed} new facts to the full-text indexes")
+            dataset.optimize.optimize_indices(index_names=[index["name"] for index in indices])
+
+    def _vector_search(self, query):
+        # nprobes and refine_factor only take effect once the vector index exists; refining
+        # re-ranks on the stored vectors so `_distance` stays exact for the similarity threshold
+        search = self.table.search(query, query_type="vector").nprobes(APIConfig.VECTOR_NPROBES)
+        if APIConfig.VECTOR_REFINE_FACTOR:
+            search = search.refine_factor(APIConfig.VECTOR_REFINE_FACTOR)
+        return search
+
+    @staticmethod
+    def make_slug(sentence: str) -> str:
+        return slugify(sentence)
+
+    def _backfill_sentence_index(self):
+        # One-off for tables that predate the index, later inserts keep it up to date
+        if self.sentence_index.count() > 0 or self.table.count_rows() == 0:
+            return
+        columns = [name for name in self.table.schema.names if name != "vector"]
+        logger.debug("Building exact-match sentence index from existing facts...")
+        for batch in self.table.to_lance().to_batches(columns=columns, batch_size=1024):
+            self.sentence_index.put_many(batch.to_pylist())
+
+    def find_exact_facts(self, sentences: List[str]) -> List[Optional[dict]]:
+        """Stored fact for each sentence whose canonical form was already checked, else None. No embedding needed."""
+        return self.sentence_index.get_many(sentences)
+
+    def embed_sentences(self, sentences: List[str]) -> List[List[float]]:
+        """Embed sentences in a single batched model call, reusing recently computed vectors."""
+        with self._embedding_lock:
+            vectors = {s: self._embedding_cache[s] for s in sentences if s in self._embedding_cache}
+        missing = [s for s in dict.fromkeys(sentences) if s not in vectors]
+        if missing:
+            logger.debug(f"Embedding {len(missing)} sentence(s)")
+            computed = self.embedder.embed(missing)
+            with self._embedding_lock:
+                for sentence, vector in zip(missing, computed):
+                    vector = list(vector)
+                    self._embedding_cache[sentence] = vector
+                    vectors[sentence] = vector
+        return [vectors[s] for s in sentences]
+
+    @property
+    def fact_columns(self) -> List[str]:
+        """Every stored column except the embedding, the default projection of all read APIs."""
+        return [name for name in self.FactChecked.model_fields if name != "vector"]
+
+    def find_nearest_facts(self, query_vectors: List[List[float]], columns: Optional[List[str]] = None) -> List[Optional[dict]]:
+        """
+        Look up the closest stored fact for each query vector in one call.
+
+        Returns one plain dict per vector (the requested columns plus `_distance`), or None when
+        the table is empty. Rows are read through Arrow, so no DataFrame is built per lookup.
+        LanceDB 0.12 only accepts a single query vector per search, so the queries are issued
+        back to back here rather than by each caller.
+        """
+        columns = columns or self.fact_columns
+        nearest = []
+        for vector in query_vectors:
+            rows = self._vector_search(vector).select(columns).limit(1).to_arrow().to_pylist()
+            nearest.append(rows[0] if rows else None)
+        return nearest
+
+    def add_fact_if_not_exists(self, fact, vector: Optional[List[float]] = None):
+        return self.add_facts_if_not_exist([fact], None if vector is None else [vector])[0]
+
+    def add_facts_if_not_exist(self, facts: List[dict], vectors: Optional[List[Optional[List[float]]]] = None) -> List[bool]:
+        """
+        Add every fact that isn't stored yet in a single table.add and return, per fact, whether it was added.
+
+        Duplicates are dropped within the batch and against the exact-match index first; only
+        the remaining facts are embedded (unless vectors are given) and checked by vector.
+        """
+        added = [False] * len(facts)
+        vectors = list(vectors) if vectors is not None else [None] * len(facts)
+        seen = set()
+        candidates = []
+        for i, (fact, existing) in enumerate(zip(facts, self.sentence_index.get_many([f["sentence"] for f in facts]))):
+            logger.debug(f"Attempting to add new fact: '{fact['sentence']}'")
+            key = sentence_key(fact["sentence"])
+            if existing is not None or key in seen:
+                logger.debug(f"Fact already exists (exact match): '{fact['sentence']}'")
+                continue
+            seen.add(key)
+            candidates.append(i)
+        if not candidates:
+            return added
+
+        missing = [i for i in candidates if vectors[i] is None]
+        if missing:
+            for i, vector in zip(missing, self.embed_sentences([facts[i]["sentence"] for i in missing])):
+                vectors[i] = vector
+        nearest = self.find_nearest_facts([vectors[i] for i in candidates], columns=["sentence"])
+
+        new_facts = []
+        for i, existing_fact in zip(candidates, nearest):
+            fact = facts[i]
+            if existing_fact is not None:
+                similarity = 1 / (1 + existing_fact['_distance'])
+                logger.debug(f"Most similar existing fact: '{existing_fact['sentence']}' with similarity {similarity}")
+                if similarity >= APIConfig.SIMILARITY_THRESHOLD and fact['sentence'] == existing_fact['sentence']:
+                    logger.debug(f"Fact already exists: '{fact['sentence']}' (similarity: {similarity})")
+                    continue
+            # Pass the vector along so LanceDB doesn't embed the sentence again on insert
+            new_facts.append({**fact, "slug": self.make_slug(fact["sentence"]), "vector": vectors[i]})
+            added[i] = True
+
+        if new_facts:
+            # seq is allocated and the batch committed under the same lock, so seq order is commit order
+            with self.index_lock():
+                first_seq = self._allocate_seq(len(new_facts))
+                for offset, fact in enumerate(new_facts):
+                    fact["seq"] = first_seq + offset
+                # One write for the whole batch, so one new fragment instead of one per fact
+                self.table.add(new_facts)
+            self.sentence_index.put_many(new_facts)
+            logger.debug(f"Added {len(new_facts)} new fact(s)")
+            try:
+                self.update_indexes()
+            except Exception as e:
+                # The facts are stored either way, the indexes catch up on the next write
+                logger.error(f"Error updating indexes: {str(e)}")
+        return added
+
+    def _allocate_seq(self, count: int) -> int:
+        # Caller holds index_lock(). The counter is shared by every worker on the host through
+        # seq.json, and only recovered from the table's highest seq when that file is missing
+        try:
+            with open(self.seq_state_path) as f:
+                first = json.load(f)["next"]
+        except (OSError, ValueError, KeyError):
+            self.table.checkout_latest()
+            highest = pc.max(self.table.to_lance().to_table(columns=["seq"])["seq"]).as_py()
+            first = 0 if highest is None else highest + 1
+        tmp_path = f"{self.seq_state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"next": first + count}, f)
+        os.replace(tmp_path, self.seq_state_path)
+        return first
 
     def to_json(self, obj):
         return json.dumps(obj, cls=LanceDBJSONEncoder)
 
-    def search_facts(self, query: str, limit: int = 10):
-        results = self.table.search(
-            query, query_type="vector").limit(limit).to_pandas()
-        return results.to_dict(orient='records')
+    def search_facts(self, query: str, limit: int = 10, columns: Optional[List[str]] = None,
+                     mode: str = "auto") -> List[dict]:
+        """
+        Facts matching a /search query, best first.
+
+        mode is "vector", "fts" (BM25 over sentence and explanation), "hybrid" (both, fused by
+        reciprocal rank) or "auto". Auto treats quoted queries and queries of at most
+        SEARCH_KEYWORD_MAX_TERMS words as keyword searches, answered by the full-text index
+        alone without running the embedding model, and falls back to hybrid when they match
+        nothing. Longer queries run hybrid.
+        """
+        if mode not in self.search_modes:
+            raise ValueError(f"mode must be one of {', '.join(self.search_modes)}")
+        columns = columns or self.fact_columns
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+        phrase = len(query.strip()) > 1 and query.strip()[0] == query.strip()[-1] == '"'
+
+        if mode == "auto":
+            if phrase or len(terms) <= APIConfig.SEARCH_KEYWORD_MAX_TERMS:
+                results = self._fts_search(terms, phrase, limit, columns)
+                if results:
+                    return results
+            mode = "hybrid"
+        if mode == "fts":
+            return self._fts_search(terms, phrase, limit, columns)
+
+        # Query vectors go through the same LRU as sentences, so repeated searches embed once
+        vector = self.embed_sentences([query.strip()])[0]
+        if mode == "vector":
+            return self._vector_search(vector).select(columns).limit(limit).to_arrow().to_pylist()
+
+        # Rank fusion needs a few more candidates than the page from each side
+        fetch_columns = columns if "sentence" in columns else columns + ["sentence"]
+        vector_results = self._vector_search(vector).select(fetch_columns).limit(limit * 2).to_arrow().to_pylist()
+        fts_results = self._fts_search(terms, phrase, limit * 2, fetch_columns)
+        scores, facts = {}, {}
+        for results in (vector_results, fts_results):
+            for rank, fact in enumerate(results):
+                scores[fact["sentence"]] = scores.get(fact["sentence"], 0) + 1 / (self.rrf_k + rank + 1)
+                facts.setdefault(fact["sentence"], fact)
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [{**{name: facts[sentence][name] for name in columns}, "_score": scores[sentence]}
+                for sentence in ranked]
+
+    def _fts_search(self, terms: List[str], phrase: bool, limit: int, columns: List[str]) -> List[dict]:
+        # Only bare lowercase words reach the query parser, so user input can't be field or
+        # boolean syntax (AND, OR, NOT, field:value, ranges)
+        words = " ".join(terms).lower()
+        query = f'"{words}"' if phrase else words
+        # Lance searches one column per query: a fact's BM25 scores on each column are summed
+        fetch_columns = columns if "sentence" in columns else columns + ["sentence"]
+        scores, facts = {}, {}
+        for column in self.fts_columns:
+            try:
+                results = self.table.search(query, query_type="fts", fts_columns=column).select(
+                    fetch_columns).limit(limit).to_arrow().to_pylist()
+            except Exception as e:
+                # No index yet (empty table) or an unparsable query, the vector side still answers
+                logger.warning(f"Full-text search on '{column}' failed for '{query}': {str(e)}")
+                continue
+            for fact in results:
+                scores[fact["sentence"]] = scores.get(fact["sentence"], 0) + fact["_score"]
+                facts.setdefault(fact["sentence"], fact)
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [{**{name: facts[sentence][name] for name in columns}, "_score": scores[sentence]}
+                for sentence in ranked]
+
+    def get_fact_by_slug(self, slug: str, columns: Optional[List[str]] = None) -> Optional[dict]:
+        """The fact whose article slug matches, served by the scalar index on `slug`."""
+        # Slugs are only ever [a-z0-9-], anything else can't match and must not reach the filter
+        if not self.slug_pattern.match(slug):
+            return None
+        rows = self.table.search().where(f"slug = '{slug}'", prefilter=True).select(
+            columns or self.fact_columns).limit(1).to_arrow().to_pylist()
+        return rows[0] if rows else None
+
+    def count_facts(self) -> int:
+        # Served from the table manifest, no rows are read
+        return self.table.count_rows()
+
+    def list_facts(self, offset: int = 0, limit: int = 10, order: str = "newest",
+                   columns: Optional[List[str]] = None) -> List[dict]:
+        """
+        One page of facts, newest or oldest first by seq, their insertion order.
+
+        Compaction and schema migrations may move rows, so pages are not read by row position:
+        only the seq column is scanned and sorted, once per table version, and the page's rows
+        are then fetched by position with Lance's take().
+        """
+        if order not in ("newest", "oldest"):
+            raise ValueError(f"Unknown order '{order}', expected 'newest' or 'oldest'")
+        dataset = self.table.to_lance()
+        seq_order = self._seq_order
+        if seq_order is None or seq_order[0] != dataset.version:
+            seq_order = self._seq_order = (
+                dataset.version, pc.sort_indices(dataset.to_table(columns=["seq"])["seq"]))
+        positions = seq_order[1]
+        total = len(positions)
+        offset = max(offset, 0)
+        if order == "newest":
+            start, stop = max(total - offset - limit, 0), total - offset
+        else:
+            start, stop = offset, min(offset + limit, total)
+        if stop <= start:
+            return []
+        page = positions[start:stop].to_pylist()
+        if order == "newest":
+            page.reverse()
+        rows = dataset.take(sorted(page), columns=columns or self.fact_columns).to_pylist()
+        # take() returns rows in position order
+        by_position = dict(zip(sorted(page), rows))
+        return [by_position[position] for position in page]
 
-    def get_all_facts(self):
-        return self.table.to_pandas().to_dict(orient='records')
+    def get_all_facts(self, columns: Optional[List[str]] = None):
+        return self.table.to_lance().to_table(columns=columns or self.fact_columns).to_pylist()
 
 
 # Custom JSON encoder for LanceDB objects
@@ -0,0 +1,109 @@
+import fcntl
+import os
+import threading
+import time
+from datetime import timedelta
+
+from config.api_config import APIConfig
+from tools.logger import logger
+
+
+def table_stats(table) -> dict:
+    """Fragments, versions, rows and bytes on disk (data, manifests and indexes) of a Lance table."""
+    dataset = table.to_lance()
+    size = 0
+    for directory, _, files in os.walk(dataset.uri):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(directory, name))
+            except OSError:
+                # Removed by a concurrent cleanup while walking
+                pass
+    return {
+        "fragments": len(dataset.get_fragments()),
+        "versions": len(dataset.versions()),
+        "rows": dataset.count_rows(),
+        "bytes": size,
+    }
+
+
+def maintain(facts_db, retention: timedelta = None) -> dict:
+    """
+    Compact the facts table, prune versions older than the retention window and refresh its indexes.
+
+    Every batch of saved facts adds a fragment and a table version. Compaction merges small
+    fragments (list_facts orders by seq, so moved rows don't matter), cleanup
+    deletes manifests and data files only versions older than `retention` still reference, and
+    the indexes are caught up with the rewritten fragments and every fact added since their
+    last build. Returns stats from before and after.
+    """
+    if retention is None:
+        retention = timedelta(hours=APIConfig.DB_VERSION_RETENTION_HOURS)
+    # A handle of its own, the worker's is read by request threads while this one commits
+    table = facts_db.db.open_table(facts_db.facts_table_name)
+    before = table_stats(table)
+    start = time.monotonic()
+
+    with facts_db.index_lock():
+        # Rewrites planned on a version older than the last worker's commits would conflict
+        table.checkout_latest()
+        compaction = table.compact_files()
+        if table.to_lance().list_indices():
+            table.to_lance().optimize.optimize_indices()
+    facts_db.update_indexes(force=True)
+    cleanup = table.cleanup_old_versions(older_than=retention)
+
+    report = {
+        "before": before,
+        "after": table_stats(table),
+        "fragments_removed": compaction.fragments_removed,
+        "fragments_added": compaction.fragments_added,
+        "versions_removed": cleanup.old_versions,
+        "bytes_removed": cleanup.bytes_removed,
+        "seconds": round(time.monotonic() - start, 2),
+    }
+    logger.info(f"Database maintenance: {format_report(report)}")
+    return report
+
+
+def format_report(report: dict) -> str:
+    before, after = report["before"], report["after"]
+    return (f"fragments {before['fragments']} -> {after['fragments']}, "
+            f"versions {before['versions']} -> {after['versions']}, "
+            f"size {before['bytes'] / 1024 ** 2:.1f}MB -> {after['bytes'] / 1024 ** 2:.1f}MB, "
+            f"{after['rows']} rows, took {report['seconds']}s")
+
+
+def start_scheduler(facts_db, interval: float):
+    """
+    Run `maintain` every `interval` seconds from a daemon thread.
+
+    Every worker starts one, but a host-wide file lock and the time of the last run (the lock
+    file's mtime) make a single worker do the work once per interval.
+    """
+    lock_path = os.path.join(facts_db.db_uri, "maintenance.lock")
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                with open(lock_path, 'a') as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # Another worker is running it right now
+                    try:
+                        last_run = os.path.getmtime(lock_path) if os.path.getsize(lock_path) else 0
+                        if time.time() - last_run < interval:
+                            continue
+                        maintain(facts_db)
+                        lock_file.truncate(0)
+                        lock_file.write(f"{time.time()}\n")
+                        lock_file.flush()
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            except Exception as e:
+                logger.error(f"Database maintenance failed: {str(e)}")
+
+    threading.Thread(target=run, name="db-maintenance", daemon=True).start()
+    logger.debug(f"Database maintenance scheduled every {interval}s")
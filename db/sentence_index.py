@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import date
+from typing import Iterable, List, Optional
+
+from tools.disk_cache import SQLiteStore
+from tools.logger import logger
+from tools.text_utils import normalize_text
+
+
+def sentence_key(sentence: str) -> str:
+    """Hash of the canonical sentence, identical for case, whitespace, quoting and punctuation variants."""
+    return hashlib.sha1(normalize_text(sentence).encode('utf-8')).hexdigest()
+
+
+class SentenceIndex(SQLiteStore):
+    """
+    Persistent exact-match index from a sentence's canonical hash to its stored fact check.
+
+    Lets repeated sentences be answered with a primary key lookup before any embedding or
+    vector search. Facts are stored without their vector, with check_date as an ISO string.
+    """
+
+    # SQLite's default limit on bound parameters per statement
+    max_batch = 900
+    # Bumped whenever sentence_key changes; older keys are dropped so FactsDB backfills them again
+    key_version = 2
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sentence_index (
+                key TEXT PRIMARY KEY,
+                fact TEXT NOT NULL
+            )""")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < self.key_version:
+                conn.execute("DELETE FROM sentence_index")
+                conn.execute(f"PRAGMA user_version = {self.key_version}")
+                logger.info(f"Sentence index keys are outdated, cleared {self.path} to be rebuilt")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sentence_index").fetchone()[0]
+
+    def get_many(self, sentences: List[str]) -> List[Optional[dict]]:
+        keys = [sentence_key(s) for s in sentences]
+        found = {}
+        conn = self._connect()
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), self.max_batch):
+            batch = unique_keys[i:i + self.max_batch]
+            placeholders = ", ".join("?" * len(batch))
+            for key, fact in conn.execute(
+                    f"SELECT key, fact FROM sentence_index WHERE key IN ({placeholders})", batch):
+                found[key] = fact
+        return [self._load(found[key]) if key in found else None for key in keys]
+
+    def get(self, sentence: str) -> Optional[dict]:
+        return self.get_many([sentence])[0]
+
+    def put_many(self, facts: Iterable[dict]):
+        # The first fact stored for a canonical sentence wins, matching the vector table dedup
+        rows = [(sentence_key(fact['sentence']), json.dumps(self._dump(fact))) for fact in facts]
+        if rows:
+            self._connect().executemany(
+                "INSERT OR IGNORE INTO sentence_index (key, fact) VALUES (?, ?)", rows)
+            logger.debug(f"Indexed {len(rows)} sentence(s) for exact match")
+
+    def put(self, fact: dict):
+        self.put_many([fact])
+
+    @staticmethod
+    def _dump(fact):
+        fact = {k: v for k, v in fact.items() if k != 'vector' and not k.startswith('_')}
+        if isinstance(fact.get('check_date'), date):
+            fact['check_date'] = fact['check_date'].isoformat()
+        return fact
+
+    @staticmethod
+    def _load(data):
+        fact = json.loads(data)
+        if fact.get('check_date'):
+            fact['check_date'] = date.fromisoformat(fact['check_date'])
+        return fact
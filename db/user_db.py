@@ -1,10 +1,9 @@
 import mysql.connector
-import time
-from config.config import Config
-
-import mysql.connector
-import time
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache
 from config.config import Config
+from db.connection_pool import ConnectionPool
 from tools.logger import logger
 
 
@@ -17,14 +16,68 @@ class UserDB:
             'database': Config.MYSQL_DATABASE,
             'port': Config.MYSQL_PORT
         }
+        # Connections are opened on first use, so none are made before gunicorn forks
+        self.pool = ConnectionPool(
+            self.config,
+            size=Config.MYSQL_POOL_SIZE,
+            max_wait=Config.MYSQL_POOL_MAX_WAIT,
+            ping_after=Config.MYSQL_POOL_PING_AFTER,
+            connect_timeout=Config.MYSQL_CONNECT_TIMEOUT,
+            retry_interval=Config.MYSQL_RETRY_INTERVAL,
+        )
+        # Subscription lookups of paid requests, by ('api_key', key) or ('auth0', id). Unknown
+        # keys are remembered for less time, so a new signup isn't turned away for long.
+        self._user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+        self._missing_user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_NEGATIVE_TTL)
+        self._user_cache_lock = threading.Lock()
+        self._usage_table_ready = False
 
+    @contextmanager
     def get_db_connection(self):
-        while True:
-            try:
-                return mysql.connector.connect(**self.config)
-            except mysql.connector.Error as err:
-                logger.error(f"Database connection error: {err}")
-                time.sleep(5)
+        # Raises DatabaseUnavailable when no connection can be had within MYSQL_POOL_MAX_WAIT
+        with self.pool.connection() as conn:
+            yield conn
+
+    # Columns kept per cached user, what require_active_subscription and invalidation need
+    cached_user_fields = ('auth0_user_id', 'api_key', 'subscription_status')
+
+    def get_cached_user(self, api_key=None, auth0_user_id=None):
+        """
+        Look a user up by auth0 id (if given) or api key through the in-process cache.
+
+        Entries live USER_CACHE_TTL seconds, or USER_CACHE_NEGATIVE_TTL for keys with no user.
+        Writes made here should be followed by invalidate_user; other workers keep their copy
+        until it expires.
+        """
+        key = ('auth0', auth0_user_id) if auth0_user_id else ('api_key', api_key)
+        with self._user_cache_lock:
+            if key in self._user_cache:
+                return self._user_cache[key]
+            if key in self._missing_user_cache:
+                return None
+        if auth0_user_id:
+            user = self.get_user_by_auth0_id(auth0_user_id)
+        else:
+            user = self.get_user_by_api_key(api_key)
+        with self._user_cache_lock:
+            if user:
+                user = {field: user.get(field) for field in self.cached_user_fields}
+                self._user_cache[key] = user
+            else:
+                self._missing_user_cache[key] = None
+        return user
+
+    def invalidate_user(self, auth0_user_id=None, api_key=None):
+        """Drop a user's cached entries, under both their auth0 id and their api key."""
+        with self._user_cache_lock:
+            keys = {('auth0', auth0_user_id), ('api_key', api_key)}
+            # The api key entry of an auth0 id (and the reverse) is found through the cached values
+            keys.update(key for key, user in self._user_cache.items()
+                        if (auth0_user_id and user['auth0_user_id'] == auth0_user_id)
+                        or (api_key and user['api_key'] == api_key))
+            for key in keys:
+                self._user_cache.pop(key, None)
+                self._missing_user_cache.pop(key, None)
 
     def execute_query(self, query, params=None, fetch=False):
         with self.get_db_connection() as conn:
@@ -135,7 +188,7 @@ class UserDB:
     # required for the webhook with stripe
     def get_user_by_stripe_customer_id(self, customer_id):
         with self.get_db_connection() as mydb:
-            mycursor = mydb.cursor(dictionary=True)
+            mycursor = mydb.cursor(dictionary=True, buffered=True)
             sql = "SELECT * FROM users WHERE stripe_customer_id = %s"
             val = (customer_id,)
             mycursor.execute(sql, val)
@@ -144,7 +197,7 @@ class UserDB:
     # used for checking if the users api key exist for zapier when a webhook is called
     def check_zapier_api_key(self, zapier_api_key):
         with self.get_db_connection() as mydb:
-            mycursor = mydb.cursor()
+            mycursor = mydb.cursor(buffered=True)
             sql = "SELECT zapier_api_key FROM users WHERE zapier_api_key = %s"
             val = (zapier_api_key,)  # Ensure this is a tuple
             mycursor.execute(sql, val)
@@ -161,3 +214,43 @@ class UserDB:
             mycursor.execute(
                 "SELECT * FROM users WHERE api_key = %s", (api_key,))
             return mycursor.fetchone()
+
+    def create_usage_table(self):
+        with self.get_db_connection() as mydb:
+            mycursor = mydb.cursor()
+            # `usage` is a reserved word in MySQL
+            mycursor.execute("""
+            CREATE TABLE IF NOT EXISTS `usage` (
+                subject_type VARCHAR(16) NOT NULL,
+                subject VARCHAR(255) NOT NULL,
+                day DATE NOT NULL,
+                requests BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                sentences BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                cache_hits BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                llm_calls BIGINT UNSIGNED NOT NULL DEFAULT 0,
+                PRIMARY KEY (subject_type, subject, day)
+            )
+            """)
+            mydb.commit()
+        self._usage_table_ready = True
+
+    # Metered usage from tools/usage_meter.py, rows are
+    # (subject_type, subject, day, requests, sentences, cache_hits, llm_calls) and add to the stored counts
+    def add_usage(self, rows, batch_size=500):
+        if not self._usage_table_ready:
+            self.create_usage_table()
+        with self.get_db_connection() as mydb:
+            mycursor = mydb.cursor()
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                sql = f"""
+                INSERT INTO `usage` (subject_type, subject, day, requests, sentences, cache_hits, llm_calls)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(batch))}
+                ON DUPLICATE KEY UPDATE
+                    requests = requests + VALUES(requests),
+                    sentences = sentences + VALUES(sentences),
+                    cache_hits = cache_hits + VALUES(cache_hits),
+                    llm_calls = llm_calls + VALUES(llm_calls)
+                """
+                mycursor.execute(sql, [value for row in batch for value in row])
+            mydb.commit()
@@ -0,0 +1,24 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+# Import the app once in the master so workers fork from it instead of importing it each
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked: model weights loaded here are shared
+    # copy-on-write. FactsDB and FactChecker hold threads and handles, so they wait for the fork,
+    # and so does the first inference, which starts the model's thread pools.
+    from tools import registry
+    registry.preload()
+
+
+def post_worker_init(worker):
+    # Open the per-worker resources before the worker takes traffic, /healthz reports ready after this
+    from tools import registry
+    registry.warmup()
@@ -0,0 +1,141 @@
+"""
+Compares the embedding backends of db/embeddings.py against sentence-transformers.
+
+Run from the repository root, with sentences from the fact journal or a text file (one per line):
+
+    python -m perf.embedding_benchmark --sentences fact_checks.jsonl --backends onnx onnx-int8
+
+Each backend runs in its own interpreter so load time and resident memory aren't skewed by the
+others. Reported per backend: load time, RSS after loading and embedding, throughput, cosine
+agreement with the reference vectors, and how many cache decisions flip. A decision is whether
+a sentence's nearest stored fact clears SIMILARITY_THRESHOLD, with similarity computed as
+1 / (1 + _distance) like FactChecker does. The stored facts are the first half of the sentences,
+and the queries are light rewrites of them plus the unseen second half.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config.api_config import APIConfig
+
+REFERENCE = "sentence-transformers"
+
+
+def load_sentences(path, limit):
+    sentences = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                line = json.loads(line).get('sentence', '')
+            if line and line not in sentences:
+                sentences.append(line)
+            if len(sentences) >= limit:
+                break
+    return sentences
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def run_backend(backend, sentences_path, output_path, repeat):
+    """Child process: embed every sentence with one backend, save the vectors, print the stats."""
+    from db.embeddings import create_embedder
+    with open(sentences_path) as f:
+        sentences = json.load(f)
+    start = time.perf_counter()
+    embedder = create_embedder(backend)
+    load_time = time.perf_counter() - start
+    embedder.embed(sentences[:8])
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectors = embedder.embed(sentences)
+        timings.append(time.perf_counter() - start)
+    np.save(output_path, np.asarray(vectors, dtype=np.float32))
+    print(json.dumps({"load_s": load_time, "rss_mb": rss_mb(), "per_s": len(sentences) / min(timings)}))
+
+
+def variants(sentence):
+    # Rewrites that should still hit the cache: case, whitespace and trailing punctuation
+    return [sentence.lower(), f"  {sentence.rstrip('.!?')} ", sentence.upper()]
+
+
+def decisions(stored, queries):
+    # LanceDB's L2 `_distance` is squared, which for unit vectors is 2 - 2 * cosine
+    dots = queries @ stored.T
+    nearest = dots.argmax(axis=1)
+    distance = np.maximum(0, 2 - 2 * dots[np.arange(len(queries)), nearest])
+    return nearest, 1 / (1 + distance) >= APIConfig.SIMILARITY_THRESHOLD
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sentences', default=APIConfig.FACT_JOURNAL_PATH,
+                        help="Fact journal (.jsonl) or text file with one sentence per line")
+    parser.add_argument('--limit', type=int, default=1000, help="Sentences to use")
+    parser.add_argument('--backends', nargs='+', default=['onnx', 'onnx-int8'])
+    parser.add_argument('--repeat', type=int, default=3, help="Timed passes, the fastest is kept")
+    parser.add_argument('--run-backend', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_backend:
+        run_backend(args.run_backend, args.sentences, args.output, args.repeat)
+        return
+
+    base = load_sentences(args.sentences, args.limit)
+    if len(base) < 4:
+        parser.error(f"Need at least 4 sentences in {args.sentences}")
+    stored_count = len(base) // 2
+    queries = [v for s in base[:stored_count] for v in variants(s)] + base[stored_count:]
+    sentences = base[:stored_count] + queries
+
+    with tempfile.TemporaryDirectory() as directory:
+        sentences_path = os.path.join(directory, 'sentences.json')
+        with open(sentences_path, 'w') as f:
+            json.dump(sentences, f)
+        results = {}
+        for backend in [REFERENCE] + [b for b in args.backends if b != REFERENCE]:
+            output_path = os.path.join(directory, f'{backend}.npy')
+            process = subprocess.run(
+                [sys.executable, '-m', 'perf.embedding_benchmark', '--run-backend', backend,
+                 '--sentences', sentences_path, '--output', output_path, '--repeat', str(args.repeat)],
+                capture_output=True, text=True)
+            if process.returncode != 0:
+                print(f"{backend}: failed\n{process.stderr[-2000:]}")
+                continue
+            stats = json.loads(process.stdout.strip().splitlines()[-1])
+            results[backend] = (stats, np.load(output_path))
+
+    if REFERENCE not in results:
+        sys.exit("The reference backend failed, nothing to compare against")
+    reference = results[REFERENCE][1]
+    ref_nearest, ref_hits = decisions(reference[:stored_count], reference[stored_count:])
+    print(f"{len(sentences)} sentences, {stored_count} stored facts, {len(queries)} queries, "
+          f"threshold {APIConfig.SIMILARITY_THRESHOLD}")
+    print(f"{'backend':<22} {'load s':>7} {'RSS MB':>7} {'sent/s':>8} {'cos mean':>9} {'cos min':>8} "
+          f"{'NN changed':>10} {'flips':>6}")
+    for backend, (stats, vectors) in results.items():
+        cosine = np.sum(vectors * reference, axis=1)
+        nearest, hits = decisions(vectors[:stored_count], vectors[stored_count:])
+        print(f"{backend:<22} {stats['load_s']:>7.1f} {stats['rss_mb']:>7.0f} {stats['per_s']:>8.1f} "
+              f"{cosine.mean():>9.5f} {cosine.min():>8.5f} {int((nearest != ref_nearest).sum()):>10} "
+              f"{int((hits != ref_hits).sum()):>6}")
+
+
+if __name__ == '__main__':
+    main()
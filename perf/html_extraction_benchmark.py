@@ -0,0 +1,101 @@
+"""
+Compares tools.html_extractor with the BeautifulSoup html.parser extraction it replaced.
+
+Run from the repository root against a directory of saved pages (*.html / *.htm):
+
+    python -m perf.html_extraction_benchmark path/to/pages --repeat 5
+
+Reports per-extractor timings, the speedup, and how many pages produce identical text.
+"""
+import argparse
+import difflib
+import glob
+import os
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from tools import html_extractor
+
+
+def reference_extract(html_content):
+    """The pre-lxml extraction from FactChecker.extract_relevant_content, kept verbatim."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    main_content = (
+        soup.find('main') or
+        soup.find('article') or
+        soup.find('div', class_='content') or
+        soup.find('div', class_='article-body') or
+        soup.find('div', id='article-body')
+    )
+    if main_content:
+        text_content = main_content.get_text(separator='\n', strip=True)
+    else:
+        paragraphs = soup.find_all('p')
+        text_content = '\n'.join([p.get_text(strip=True) for p in paragraphs])
+    if len(text_content) < 100:
+        text_content = soup.get_text(separator='\n', strip=True)
+    if len(text_content) < 100:
+        return None
+    return text_content[:5000]
+
+
+def reference_ld_json(html_content):
+    """The pre-lxml JSON-LD lookup of FactChecker.fallback_content_extraction, kept verbatim."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    script_tag = soup.find('script', {'type': 'application/ld+json'})
+    if script_tag:
+        return script_tag.string
+    return None
+
+
+def best_time(func, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(content)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', help="Directory of saved HTML pages")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per page, the fastest is kept")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.pages, '*.htm*')))
+    if not paths:
+        parser.error(f"No .html files found in {args.pages}")
+
+    old_times, new_times, similarities, mismatches = [], [], [], []
+    for path in paths:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        # BeautifulSoup got response.text, the new extractor gets the raw bytes as streamed
+        text = raw.decode('utf-8', errors='replace')
+        old, old_time = best_time(reference_extract, text, args.repeat)
+        new, new_time = best_time(html_extractor.extract_main_text, raw, args.repeat)
+        old_times.append(old_time)
+        new_times.append(new_time)
+        similarity = difflib.SequenceMatcher(None, old or '', new or '').ratio() if old != new else 1.0
+        similarities.append(similarity)
+        if old != new:
+            mismatches.append((similarity, os.path.basename(path)))
+
+    old_total, new_total = sum(old_times), sum(new_times)
+    print(f"Pages:                 {len(paths)}")
+    print(f"BeautifulSoup total:   {old_total * 1000:.1f} ms (median {statistics.median(old_times) * 1000:.2f} ms/page)")
+    print(f"lxml streaming total:  {new_total * 1000:.1f} ms (median {statistics.median(new_times) * 1000:.2f} ms/page)")
+    print(f"Speedup:               {old_total / new_total:.1f}x")
+    print(f"Identical output:      {len(paths) - len(mismatches)}/{len(paths)}")
+    print(f"Mean text similarity:  {statistics.mean(similarities):.4f}")
+    for similarity, name in sorted(mismatches)[:10]:
+        print(f"  {similarity:.4f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Reports where a cold import of the app spends its time, using Python's -X importtime.
+
+Run from the repository root:
+
+    python -m perf.import_profile --module app --top 25
+
+The module is imported in a fresh interpreter. The report lists the packages that cost the most
+import time (each module's own time, summed by top-level package, so nothing is counted twice),
+then the total wall time and peak RSS of that interpreter. Use it to
+check that a change hasn't moved a heavy dependency (torch, nltk, googleapiclient, stripe,
+pytesseract, pandas...) back onto the import path.
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s*(\S+)")
+
+# Printed by the child once the import is done: wall time and peak RSS in KB (Linux ru_maxrss)
+PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+sys.stdout.write(f"{{time.perf_counter() - start}} {{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}")
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Packages to list")
+    args = parser.parse_args()
+
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE.format(module=args.module)],
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        sys.exit(process.stderr[-2000:])
+
+    packages = {}
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            package = match.group(2).split(".")[0]
+            packages[package] = packages.get(package, 0) + int(match.group(1))
+
+    wall, max_rss = process.stdout.split()
+    print(f"{'package':<32} {'import ms':>10}")
+    for package, micros in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<32} {micros / 1000:>10.1f}")
+    print(f"\nimport {args.module}: {float(wall):.2f}s wall, {int(max_rss) / 1024:.0f} MB peak RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Measures the IVF-PQ index FactsDB.update_indexes builds against exact search.
+
+Run from the repository root (the 1M row table needs ~2GB of RAM and a few minutes to index):
+
+    python -m perf.vector_index_benchmark --sizes 10000 100000 1000000 --queries 500
+
+For each table size it builds a scratch LanceDB table of synthetic 384-dimension embeddings,
+then reports recall@1 of the indexed search against numpy brute force, separately for
+near-duplicates of stored facts (what the cache lookup must not miss) and unseen sentences,
+and p50/p99 latency of a single-vector lookup with and without the index. Index parameters,
+nprobes and refine_factor come from FactsDB and APIConfig, so VECTOR_NPROBES=... etc. can be
+set to compare settings.
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from config.api_config import APIConfig
+from db.facts_db import FactsDB
+
+NDIMS = 384
+WRITE_BATCH = 50_000
+
+
+def synthetic_vectors(rng, count, centers):
+    # Unit vectors scattered around topic centers, closer to sentence embeddings than uniform noise
+    topics = rng.integers(0, len(centers), count)
+    vectors = centers[topics] + rng.normal(scale=0.35, size=(count, NDIMS)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_table(db, rng, size, centers):
+    schema = pa.schema([("id", pa.int64()), ("vector", pa.list_(pa.float32(), NDIMS))])
+    table = db.create_table(f"bench_{size}", schema=schema, mode="overwrite")
+    vectors = np.empty((size, NDIMS), dtype=np.float32)
+    for start in range(0, size, WRITE_BATCH):
+        batch = synthetic_vectors(rng, min(WRITE_BATCH, size - start), centers)
+        vectors[start:start + len(batch)] = batch
+        table.add(pa.table({
+            "id": pa.array(np.arange(start, start + len(batch))),
+            "vector": pa.FixedSizeListArray.from_arrays(pa.array(batch.ravel()), NDIMS),
+        }))
+    return table, vectors
+
+
+def exact_nearest(vectors, queries):
+    # Squared L2, the metric the table is searched with
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    return [int(np.argmin(norms - 2 * vectors @ query)) for query in queries]
+
+
+def timed_lookups(table, queries, indexed):
+    ids, latencies = [], []
+    for query in queries:
+        search = table.search(query).select(["id"]).limit(1)
+        if indexed:
+            search = search.nprobes(APIConfig.VECTOR_NPROBES)
+            if APIConfig.VECTOR_REFINE_FACTOR:
+                search = search.refine_factor(APIConfig.VECTOR_REFINE_FACTOR)
+        start = time.perf_counter()
+        rows = search.to_arrow()
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(rows["id"][0].as_py())
+    return ids, latencies
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=500, help="Lookups timed per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(256, NDIMS)).astype(np.float32)
+    directory = tempfile.mkdtemp(prefix="vector_index_benchmark_")
+    db = lancedb.connect(directory)
+    print(f"nprobes={APIConfig.VECTOR_NPROBES} refine_factor={APIConfig.VECTOR_REFINE_FACTOR}")
+    print(f"{'rows':>9} {'build s':>8} {'recall dup':>10} {'recall new':>10} {'flat p50':>9} {'flat p99':>9} {'ann p50':>8} {'ann p99':>8}  (ms)")
+    try:
+        for size in args.sizes:
+            table, vectors = build_table(db, rng, size, centers)
+            # Half near-duplicates of stored facts (the cache-hit case), half unseen sentences
+            near = vectors[rng.integers(0, size, args.queries // 2)]
+            near = near + rng.normal(scale=0.02, size=near.shape).astype(np.float32)
+            queries = np.vstack([near, synthetic_vectors(rng, args.queries - len(near), centers)])
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            expected = exact_nearest(vectors, queries)
+
+            _, flat_latencies = timed_lookups(table, queries, indexed=False)
+            params = FactsDB.vector_index_params(size, NDIMS)
+            start = time.perf_counter()
+            table.create_index(metric="L2", vector_column_name="vector", replace=True, **params)
+            build_time = time.perf_counter() - start
+            found, ann_latencies = timed_lookups(table, queries, indexed=True)
+
+            hits = [a == b for a, b in zip(found, expected)]
+            dup_recall = sum(hits[:len(near)]) / len(near)
+            new_recall = sum(hits[len(near):]) / (len(hits) - len(near))
+            print(f"{size:>9} {build_time:>8.1f} {dup_recall:>10.3f} {new_recall:>10.3f} "
+                  f"{percentile(flat_latencies, 50):>9.2f} {percentile(flat_latencies, 99):>9.2f} "
+                  f"{percentile(ann_latencies, 50):>8.2f} {percentile(ann_latencies, 99):>8.2f}")
+            db.drop_table(f"bench_{size}")
+            del vectors
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
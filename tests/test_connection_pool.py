@@ -0,0 +1,159 @@
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+from db.connection_pool import ConnectionPool, DatabaseUnavailable
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise mysql.connector.InterfaceError("MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMySQL:
+    """Stands in for mysql.connector.connect, failing while `down` is set."""
+
+    def __init__(self):
+        self.connections = []
+        self.down = False
+        self.attempts = 0
+
+    def connect(self, **config):
+        self.attempts += 1
+        if self.down:
+            raise mysql.connector.InterfaceError("Can't connect to MySQL server")
+        self.connections.append(FakeConnection())
+        return self.connections[-1]
+
+
+@pytest.fixture
+def mysql_server(monkeypatch):
+    server = FakeMySQL()
+    monkeypatch.setattr(mysql.connector, "connect", server.connect)
+    return server
+
+
+def make_pool(size=2, max_wait=0.2, ping_after=60, retry_interval=60):
+    return ConnectionPool({"host": "db"}, size=size, max_wait=max_wait, ping_after=ping_after,
+                          connect_timeout=1, retry_interval=retry_interval)
+
+
+def test_connections_are_reused_and_slots_accounted(mysql_server):
+    pool = make_pool()
+
+    with pool.connection() as first:
+        with pool.connection() as second:
+            assert pool.stats()["in_use"] == 2
+        assert pool.stats()["in_use"] == 1
+    with pool.connection() as again:
+        assert again is first
+
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["in_use"], stats["acquired"]) == (2, 2, 0, 3)
+    assert len(mysql_server.connections) == 2
+    assert second is not first
+
+
+def test_exhausted_pool_raises_after_max_wait(mysql_server):
+    pool = make_pool(size=1, max_wait=0.2)
+
+    with pool.connection():
+        start = time.monotonic()
+        with pytest.raises(DatabaseUnavailable):
+            with pool.connection():
+                pass
+        assert time.monotonic() - start >= 0.2
+
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["waited"], stats["open"]) == (1, 1, 1)
+
+
+def test_waiter_gets_the_connection_released_in_time(mysql_server):
+    pool = make_pool(size=1, max_wait=2)
+    released = threading.Event()
+
+    def hold():
+        with pool.connection():
+            released.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while pool.stats()["in_use"] == 0:
+        time.sleep(0.01)
+    threading.Timer(0.1, released.set).start()
+    with pool.connection() as conn:
+        assert conn is mysql_server.connections[0]
+    holder.join()
+
+
+def test_stale_idle_connection_is_replaced(mysql_server):
+    pool = make_pool(ping_after=0)
+
+    with pool.connection() as first:
+        pass
+    first.alive = False
+    with pool.connection() as second:
+        assert second is not first
+
+    assert first.closed
+    stats = pool.stats()
+    assert (stats["stale"], stats["open"]) == (1, 1)
+
+
+def test_open_transaction_is_rolled_back_on_release(mysql_server):
+    pool = make_pool()
+
+    with pool.connection() as conn:
+        conn.in_transaction = True
+
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_connection_error_discards_the_connection(mysql_server):
+    pool = make_pool()
+
+    with pytest.raises(mysql.connector.OperationalError):
+        with pool.connection() as conn:
+            raise mysql.connector.OperationalError("Lost connection to MySQL server during query")
+
+    assert conn.closed
+    stats = pool.stats()
+    assert (stats["discarded"], stats["open"], stats["idle"]) == (1, 0, 0)
+
+
+def test_failed_connect_fails_fast_until_retry_interval(mysql_server):
+    pool = make_pool(retry_interval=0.2)
+    mysql_server.down = True
+
+    with pytest.raises(DatabaseUnavailable, match="Cannot connect"):
+        with pool.connection():
+            pass
+    mysql_server.down = False
+    with pytest.raises(DatabaseUnavailable, match="not retrying yet"):
+        with pool.connection():
+            pass
+    # The fast failure neither reached MySQL nor kept a slot
+    assert mysql_server.attempts == 1
+    assert pool.stats()["open"] == 0
+
+    time.sleep(0.2)
+    with pool.connection() as conn:
+        assert conn is mysql_server.connections[0]
+    assert pool.stats()["connect_errors"] == 1
@@ -0,0 +1,83 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import nltk.tokenize
+import pytest
+
+from tools.fact_checker import FactChecker
+
+STORED_FACT = {
+    'explanation': 'Already checked.',
+    'rating': 'True',
+    'severity': 'low',
+    'key_points': [],
+    'source': [],
+    'check_date': None,
+}
+
+
+class FakeFactsDB:
+    """Only "Stored claim." has a stored fact check, every other sentence goes to the LLM."""
+
+    def find_exact_facts(self, sentences):
+        return [dict(STORED_FACT, sentence=s) if s == "Stored claim." else None for s in sentences]
+
+    def embed_sentences(self, sentences):
+        return [[float(len(s))] for s in sentences]
+
+    def find_nearest_facts(self, vectors, columns=None):
+        return [None] * len(vectors)
+
+
+def llm_check(sentence, idx):
+    # Like get_custom_search_fact_check, the parsed model answer has no id.
+    # The slow sentence finishes after the ones following it.
+    if sentence.startswith("Slow"):
+        time.sleep(0.2)
+    return {
+        'sentence': sentence,
+        'explanation': 'Checked now.',
+        'rating': 'False',
+        'severity': 'high',
+        'key_points': [],
+        'source': [],
+    }
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    monkeypatch.setattr(nltk.tokenize, "sent_tokenize",
+                        lambda text: [s.strip() + "." for s in text.split(".") if s.strip()])
+    # No caches, journal or API clients, only what analyze_text_iter uses
+    checker = FactChecker.__new__(FactChecker)
+    checker.db = FakeFactsDB()
+    checker.logger = logging.getLogger(__name__)
+    checker.executor = ThreadPoolExecutor(max_workers=4)
+    checker.save_executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(checker, "get_custom_search_fact_check", llm_check)
+    yield checker
+    checker.executor.shutdown(wait=True)
+    checker.save_executor.shutdown(wait=True)
+
+
+def test_streamed_llm_results_carry_their_sentence_id(checker):
+    results = list(checker.analyze_text_iter("Slow claim. Stored claim. Fast claim."))
+
+    assert [result['id'] for result in results] == [2, 3, 1]
+    assert {result['id']: result['sentence'] for result in results} == {
+        1: "Slow claim.", 2: "Stored claim.", 3: "Fast claim."}
+
+
+def test_streamed_llm_results_are_saved_in_one_batch_with_their_vectors(checker, monkeypatch):
+    saved = []
+    monkeypatch.setattr(checker, "save_fact_checks",
+                        lambda results, vectors=None: saved.append((results, vectors)))
+
+    list(checker.analyze_text_iter("Slow claim. Stored claim. Fast claim.", save=True))
+    checker.save_executor.shutdown(wait=True)
+
+    assert len(saved) == 1
+    results, vectors = saved[0]
+    assert [result['sentence'] for result in results] == ["Fast claim.", "Slow claim."]
+    assert vectors == [[float(len("Fast claim."))], [float(len("Slow claim."))]]
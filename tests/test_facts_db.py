@@ -0,0 +1,105 @@
+import hashlib
+
+import pytest
+
+from db.embeddings import Embedder
+from db.facts_db import FactsDB
+from tools import registry
+
+
+class HashEmbedder(Embedder):
+    """Bag of hashed words, enough to tell test sentences apart without a model."""
+
+    ndims = 16
+    vector_space = "sentence-transformers:BAAI/bge-small-en-v1.5"
+
+    def embed(self, sentences):
+        vectors = []
+        for sentence in sentences:
+            vector = [0.0] * self.ndims
+            for word in sentence.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.ndims] += 1.0
+            norm = sum(x * x for x in vector) ** 0.5 or 1.0
+            vectors.append([x / norm for x in vector])
+        return vectors
+
+
+def fact(sentence):
+    return {'sentence': sentence, 'explanation': 'Checked.', 'rating': 'True', 'severity': 'low',
+            'key_points': [], 'source': [], 'check_date': None}
+
+
+@pytest.fixture
+def facts_db(tmp_path, monkeypatch):
+    monkeypatch.setitem(registry._instances, "embedder", HashEmbedder())
+    return FactsDB(str(tmp_path / "lancedb"))
+
+
+def test_list_facts_pages_by_insertion_order(facts_db):
+    for batch in range(3):
+        facts_db.add_facts_if_not_exist([fact(f"Claim number {batch * 2 + i} about topic {batch}.") for i in range(2)])
+
+    newest = facts_db.list_facts(limit=4, columns=['seq', 'sentence'])
+    assert [row['seq'] for row in newest] == [5, 4, 3, 2]
+    assert newest[0]['sentence'] == "Claim number 5 about topic 2."
+    assert [row['seq'] for row in facts_db.list_facts(offset=4, limit=4, order='oldest', columns=['seq'])] == [4, 5]
+
+
+def test_list_facts_order_survives_rewritten_rows(facts_db):
+    facts_db.add_facts_if_not_exist([fact(f"Claim number {i} about topic {i}.") for i in range(5)])
+    # Stand-in for compaction or a migration writing the rows back in another order
+    rows = facts_db.table.to_lance().to_table()
+    facts_db.db.create_table(facts_db.facts_table_name, data=rows.take([4, 2, 0, 3, 1]), mode="overwrite")
+    facts_db.table.checkout_latest()
+
+    assert [row['seq'] for row in facts_db.list_facts(limit=5, order='oldest', columns=['seq'])] == [0, 1, 2, 3, 4]
+
+    facts_db.add_facts_if_not_exist([fact("A later claim about something else.")])
+    assert facts_db.list_facts(limit=1)[0]['sentence'] == "A later claim about something else."
+
+
+def test_seq_counter_is_recovered_from_the_table(facts_db, tmp_path):
+    facts_db.add_facts_if_not_exist([fact(f"Claim number {i} about topic {i}.") for i in range(3)])
+    (tmp_path / "lancedb" / "seq.json").unlink()
+
+    facts_db.add_facts_if_not_exist([fact("A later claim about something else.")])
+
+    assert facts_db.list_facts(limit=1, columns=['seq'])[0]['seq'] == 3
+
+
+def test_full_text_indexes_take_new_facts_without_a_rebuild(facts_db, monkeypatch):
+    monkeypatch.setattr("config.api_config.APIConfig.FTS_INDEX_REFRESH_ROWS", 2)
+    facts_db.add_facts_if_not_exist([fact("Quokkas are the happiest animals.")])
+    assert sorted(index["name"] for index in facts_db._fts_indices(facts_db.table.to_lance())) == [
+        "explanation_idx", "sentence_idx"]
+
+    facts_db.add_facts_if_not_exist([fact("Wombats produce cube shaped droppings.")])
+    assert facts_db.search_facts("wombats", mode="fts", columns=["sentence"]) == []
+
+    facts_db.add_facts_if_not_exist([fact("Koalas sleep twenty hours a day.")])
+    assert [row["sentence"] for row in facts_db.search_facts("wombats", mode="fts", columns=["sentence"])] == [
+        "Wombats produce cube shaped droppings."]
+    assert [row["sentence"] for row in facts_db.search_facts('"sleep twenty"', mode="fts", columns=["sentence"])] == [
+        "Koalas sleep twenty hours a day."]
+    assert facts_db.search_facts('"twenty sleep"', mode="fts", columns=["sentence"]) == []
+
+
+class OtherSpaceEmbedder(HashEmbedder):
+    ndims = 8
+    vector_space = "BAAI/bge-small-en-v1.5:int8"
+
+
+def test_reembed_moves_the_table_to_the_embedders_vector_space(facts_db, monkeypatch):
+    facts_db.add_facts_if_not_exist([fact(f"Claim number {i} about topic {i}.") for i in range(3)])
+    monkeypatch.setitem(registry._instances, "embedder", OtherSpaceEmbedder())
+
+    with pytest.raises(ValueError, match="reembed-db"):
+        FactsDB(facts_db.db_uri)
+
+    reembedded = FactsDB(facts_db.db_uri, reembed=True)
+    assert reembedded.count_facts() == 3
+    assert [row['seq'] for row in reembedded.list_facts(columns=['seq'])] == [2, 1, 0]
+    nearest = reembedded.find_nearest_facts(OtherSpaceEmbedder().embed(["Claim number 1 about topic 1."]))
+    assert nearest[0]['sentence'] == "Claim number 1 about topic 1." and nearest[0]['_distance'] < 1e-6
+    # Opening it again no longer needs the flag
+    assert FactsDB(facts_db.db_uri).count_facts() == 3
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from perf.html_extraction_benchmark import reference_extract, reference_ld_json
+from tools import html_extractor
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+# Page -> how the extraction finds its text, and where that text starts
+PAGES = {
+    'main_news.html': ('<main>', "City council approves new bike lanes"),
+    'article_blog.html': ('<article>', "Does cracking your knuckles cause arthritis?"),
+    'content_div.html': ('div.content', "Regional water utility reports 2023 results"),
+    'article_body_id.html': ('div#article-body', "How daylight saving time started"),
+    'paragraphs_only.html': ('<p> only', "The claim that the Great Wall"),
+    'all_text_fallback.html': ('all text', "Election results dashboard"),
+    'msn_ld_json.html': ('JSON-LD, too little text', None),
+}
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_extract_main_text_matches_the_beautifulsoup_extraction(name):
+    raw = read_page(name)
+    # BeautifulSoup got response.text, the lxml extractor gets the body as streamed
+    expected = reference_extract(raw.decode('utf-8'))
+
+    assert html_extractor.extract_main_text(raw) == expected
+    assert html_extractor.extract_main_text(raw[i:i + 97] for i in range(0, len(raw), 97)) == expected
+
+    start = PAGES[name][1]
+    if start is None:
+        assert expected is None
+    else:
+        assert expected.startswith(start)
+
+
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_extract_ld_json_matches_the_beautifulsoup_lookup(name):
+    raw = read_page(name)
+
+    assert html_extractor.extract_ld_json(raw) == reference_ld_json(raw.decode('utf-8'))
+
+
+def test_extract_ld_json_returns_the_first_script():
+    ld_json = html_extractor.extract_ld_json(read_page('msn_ld_json.html'))
+
+    assert '"headline":"Scientists map the ocean floor in record detail"' in ld_json
@@ -0,0 +1,84 @@
+import pytest
+
+from tools import rate_limit
+from tools.rate_limit import TokenBuckets, describe_rate_limits, parse_rate_limits
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+def make_buckets(tmp_path, spec):
+    return TokenBuckets(str(tmp_path / "rate_limits.sqlite"), parse_rate_limits(spec))
+
+
+def test_parse_and_describe_rate_limits():
+    limits = parse_rate_limits(" 5/60, 15/86400 ,")
+
+    assert limits == [(5.0, 60.0), (15.0, 86400.0)]
+    assert describe_rate_limits(limits) == "5 per minute and 15 per day"
+    assert parse_rate_limits("") == []
+
+
+def test_bucket_refills_over_its_period(tmp_path, clock):
+    buckets = make_buckets(tmp_path, "2/60")
+
+    assert buckets.take("ip:1") == 0
+    assert buckets.take("ip:1") == 0
+    assert buckets.take("ip:1") == 30
+    # Other keys have buckets of their own
+    assert buckets.take("ip:2") == 0
+
+    clock.now += 30
+    assert buckets.take("ip:1") == 0
+    assert buckets.take("ip:1") == 30
+
+
+def test_take_is_all_or_nothing_across_limits(tmp_path, clock):
+    buckets = make_buckets(tmp_path, "2/60,3/3600")
+
+    assert [buckets.take("user:a") for _ in range(3)] == [0, 0, 30]
+    # The refused take didn't spend the hourly bucket's last token
+    clock.now += 60
+    assert buckets.take("user:a") == 0
+    # Now the hourly bucket is the short one (0.05 tokens refilled in that minute), the minute
+    # bucket still has a token
+    assert buckets.take("user:a") == 1140
+
+
+def test_workers_share_buckets_through_the_file(tmp_path, clock):
+    first, second = make_buckets(tmp_path, "1/60"), make_buckets(tmp_path, "1/60")
+
+    assert first.take("ip:1") == 0
+    assert second.take("ip:1") == 60
+
+
+def test_prune_drops_only_buckets_that_are_full_again(tmp_path, clock):
+    buckets = make_buckets(tmp_path, "2/60")
+    buckets.take("ip:old")
+    clock.now += 45
+    buckets.take("ip:new")
+
+    clock.now += 20
+    buckets.prune()
+
+    keys = [key for key, in buckets._connect().execute("SELECT key FROM token_buckets")]
+    assert keys == ["ip:new"]
+    assert buckets.take("ip:old") == 0 and buckets.take("ip:old") == 0
+
+
+def test_no_limits_always_allows(tmp_path):
+    buckets = make_buckets(tmp_path, "")
+
+    assert all(buckets.take("ip:1") == 0 for _ in range(100))
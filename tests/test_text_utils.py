@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+from db.sentence_index import SentenceIndex, sentence_key
+from tools.text_utils import normalize_text
+
+
+@pytest.mark.parametrize('variant', [
+    'The moon landing was faked in 1969',
+    'The moon landing was faked in 1969.',
+    'The moon landing was faked in 1969?!',
+    '"The moon landing was faked in 1969."',
+    '“The moon landing was faked in 1969.”',
+    '‘The moon landing was faked in 1969’.',
+    "'The moon landing was faked in 1969'",
+    'THE MOON LANDING WAS FAKED IN 1969',
+    '  The moon   landing was\nfaked in 1969 . ',
+])
+def test_sentence_variants_share_one_key(variant):
+    assert normalize_text(variant) == 'the moon landing was faked in 1969'
+    assert sentence_key(variant) == sentence_key('The moon landing was faked in 1969')
+
+
+def test_quotes_and_punctuation_inside_the_sentence_are_kept():
+    assert normalize_text('He said “no”, twice.') == 'he said "no", twice'
+    assert normalize_text("It's 3.5% higher.") == "it's 3.5% higher"
+
+
+def test_sentence_index_drops_keys_from_an_older_version(tmp_path):
+    path = str(tmp_path / 'sentence_index.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sentence_index (key TEXT PRIMARY KEY, fact TEXT NOT NULL)")
+    conn.execute("INSERT INTO sentence_index VALUES ('old-key', '{}')")
+    conn.commit()
+    conn.close()
+
+    index = SentenceIndex(path)
+    assert index.count() == 0
+
+    index.put({'sentence': '"Water boils at 100 C."', 'rating': 'True'})
+    assert SentenceIndex(path).get('water boils at 100 c')['rating'] == 'True'
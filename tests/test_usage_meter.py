@@ -0,0 +1,45 @@
+from datetime import date
+
+from tools.usage_meter import UsageMeter
+
+
+class FakeUserDB:
+    def __init__(self):
+        self.fail = False
+        self.rows = []
+
+    def add_usage(self, rows):
+        if self.fail:
+            raise ConnectionError("MySQL is down")
+        self.rows.extend(rows)
+
+
+def test_counts_are_aggregated_per_subject_and_day():
+    user_db = FakeUserDB()
+    meter = UsageMeter(user_db, flush_interval=3600)
+
+    meter.record({'ip': '10.0.0.1', 'user': 'auth0|1'}, {'requests': 1, 'sentences': 3, 'ignored': 7})
+    meter.record({'ip': '10.0.0.1', 'user': None}, {'requests': 1, 'cache_hits': 2})
+
+    assert meter.flush() == 2
+    today = date.today()
+    assert sorted(user_db.rows) == [
+        ('ip', '10.0.0.1', today, 2, 3, 2, 0),
+        ('user', 'auth0|1', today, 1, 3, 0, 0),
+    ]
+    assert meter.flush() == 0
+
+
+def test_failed_flush_keeps_the_counts_for_the_next_one():
+    user_db = FakeUserDB()
+    meter = UsageMeter(user_db, flush_interval=3600)
+    meter.record({'ip': '10.0.0.1'}, {'requests': 1, 'llm_calls': 2})
+
+    user_db.fail = True
+    assert meter.flush() == 0
+    # Recorded while MySQL was down, merged with the re-queued counts
+    meter.record({'ip': '10.0.0.1'}, {'requests': 1})
+    user_db.fail = False
+
+    assert meter.flush() == 1
+    assert user_db.rows == [('ip', '10.0.0.1', date.today(), 2, 0, 0, 2)]
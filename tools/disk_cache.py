@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from tools.logger import logger
+
+# Returned by DiskCache.get when a key is absent or expired, since None is a valid cached value
+MISS = object()
+
+
+class SQLiteStore:
+    """Base for small SQLite files shared by every thread and worker process on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections can't cross threads or forks, so each thread of each process opens its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class DiskCache(SQLiteStore):
+    """
+    Persistent key/value cache stored in a local SQLite file.
+
+    Values are JSON, zlib-compressed on disk and expire after a per-entry TTL. Once the stored
+    size passes max_bytes the least recently used entries are evicted. WAL mode lets every
+    thread and every worker process on the host share the same file.
+    """
+
+    # Recency is only rewritten when older than this, so hot keys don't turn reads into writes
+    touch_interval = 60
+    # Size is only checked every N writes, summing the table on every set would be wasteful
+    evict_every = 50
+
+    def __init__(self, path: str, max_bytes: int):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._connect().execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def get(self, key: str, default=MISS):
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            value, expires_at, accessed_at = row
+            now = time.time()
+            if expires_at < now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return default
+            if now - accessed_at > self.touch_interval:
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(zlib.decompress(value))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"Cache read failed for '{key}' in {self.path}: {e}")
+            return default
+
+    def set(self, key: str, value, ttl: float):
+        try:
+            blob = zlib.compress(json.dumps(value).encode('utf-8'))
+            now = time.time()
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob) + len(key), now + ttl, now))
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self.evict()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Cache write failed for '{key}' in {self.path}: {e}")
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until the cache fits in max_bytes."""
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        stale_keys = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            stale_keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache WHERE key = ?", stale_keys)
+        logger.debug(f"Evicted {len(stale_keys)} entries from {self.path}")
@@ -3,32 +3,63 @@ from datetime import date
 from tools.logger import logger
 from dotenv import load_dotenv
 import os
-from googleapiclient.discovery import build
-from duckduckgo_search import DDGS
-import requests
 # Fact-checking imports
-from nltk.tokenize import sent_tokenize
 import openai
-from googleapiclient.discovery import build
-from duckduckgo_search import DDGS
 from datetime import datetime
 import httpx
 import time
 import random
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 from pydantic import BaseModel
-from pandas import DataFrame, notnull
-import numpy as np
 import traceback
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from config.api_config import APIConfig
+from tools import http_client, html_extractor
+from tools.disk_cache import DiskCache, MISS
+from tools.text_utils import normalize_text
 from db.facts_db import FactsDB
-from googlesearch import search
+from db.fact_journal import FactJournal
+from googlesearch import search, SearchResult
 import logging
 
 load_dotenv()
 
+# Explanation of the placeholder result returned when checking a sentence fails
+ERROR_EXPLANATION = 'Error in fact-checking'
+
+# Where a sentence's result came from: a stored fact check, a new LLM check, or the error placeholder
+ORIGIN_CACHE = 'cache'
+ORIGIN_LLM = 'llm'
+ORIGIN_ERROR = 'error'
+# Usage counter each origin adds to, see analyze_text
+ORIGIN_USAGE = {ORIGIN_CACHE: 'cache_hits', ORIGIN_LLM: 'llm_calls', ORIGIN_ERROR: 'errors'}
+
+# Stored columns a cached result is built from, vector lookups read nothing else
+STORED_RESULT_COLUMNS = ['sentence', 'explanation', 'rating', 'severity', 'key_points', 'source', 'check_date']
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'ocid', 'cvid', 'ei', 'ref', 'ref_src'}
+
+
+def normalize_url(url):
+    """Canonical form of a URL used as cache key: lowercase host, no fragment, tracking params, or default port."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS))
+    return urlunsplit((scheme, host, parts.path.rstrip('/') or '/', query, ''))
+
+
+def search_cache_key(provider, query, **params):
+    """Cache key for a search: provider, its parameters and the normalized query."""
+    return f"{provider}:{json.dumps(params, sort_keys=True)}:{normalize_text(query)}"
+
 
 class FactChecker:
     def __init__(self, db: FactsDB, logger=logger):
@@ -38,16 +69,54 @@ class FactChecker:
         self.google_base_url = 'https://factchecktools.googleapis.com/v1alpha1/claims:search'
         self.google_api_key = os.environ.get('GOOGLE_API_KEY')
         openai.api_key = os.environ.get('OPENAI_API_KEY')
-        self.custom_search_service = build(
-            "customsearch", "v1", developerKey=self.google_api_key)
-        self.ddgs = DDGS()
+        self._custom_search_service = None
+        self._custom_search_lock = threading.Lock()
+        self._local = threading.local()
+        self.content_cache = DiskCache(
+            os.path.join(APIConfig.CACHE_DIR, 'page_content.sqlite'),
+            max_bytes=APIConfig.CONTENT_CACHE_MAX_BYTES)
+        self.journal = FactJournal(
+            APIConfig.FACT_JOURNAL_PATH, legacy_json_path=APIConfig.FACT_JSON_PATH,
+            fsync_every=APIConfig.FACT_JOURNAL_FSYNC_EVERY, fsync_interval=APIConfig.FACT_JOURNAL_FSYNC_INTERVAL)
+        self.search_cache = DiskCache(
+            os.path.join(APIConfig.CACHE_DIR, 'search_results.sqlite'),
+            max_bytes=APIConfig.SEARCH_CACHE_MAX_BYTES)
+        # Bounded pool shared by all requests so concurrent pastes can't multiply outbound calls
+        max_workers = APIConfig.MAX_CONCURRENT_CHECKS
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fact-check") if max_workers > 1 else None
+        # Separate pool for searches and page fetches, sentence tasks wait on it so they must not share
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=APIConfig.MAX_CONCURRENT_FETCHES, thread_name_prefix="evidence")
+        # Single background writer, saves are serialized so batches dedupe against each other
+        self.save_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fact-saver")
+
+    # Built on first use, the discovery client is slow to import and construct
+    @property
+    def custom_search_service(self):
+        if self._custom_search_service is None:
+            with self._custom_search_lock:
+                if self._custom_search_service is None:
+                    from googleapiclient.discovery import build
+                    self._custom_search_service = build(
+                        "customsearch", "v1", developerKey=self.google_api_key)
+        return self._custom_search_service
+
+    # DDGS keeps per-session state, so every worker thread gets its own instance
+    @property
+    def ddgs(self):
+        if not hasattr(self._local, 'ddgs'):
+            from duckduckgo_search import DDGS
+            self._local.ddgs = DDGS()
+        return self._local.ddgs
 
     def get_fact_checks(self, text):
         params = {
             'key': self.google_api_key,
             'query': text
         }
-        response = requests.get(self.google_base_url, params=params)
+        response = http_client.get(self.google_base_url, params=params)
         return response.json()
 
     def get_severity(self, rating):
@@ -88,54 +157,154 @@ class FactChecker:
             return self.get_custom_search_fact_check(sentence, idx)
 
     # Analyzes the text and returns a list of fact-checks
-    def analyze_text(self, text):
+    # Sentences are checked concurrently on the shared executor; results keep the original id order.
+    # When a Counter is passed as usage, it gets the number of sentences and of results per origin
+    # (cache_hits, llm_calls and errors). With save, the new checks are handed to the background
+    # writer together with the vectors their sentences were looked up with.
+    def analyze_text(self, text, usage=None, save=False):
+        # nltk is slow to import, only pay for it once there is text to split
+        from nltk.tokenize import sent_tokenize
         sentences = sent_tokenize(text)
         self.logger.debug(f"Tokenized {len(sentences)} sentences")
-        results = []
-        for i, sentence in enumerate(sentences, 1):
-            try:
-                self.logger.debug(f"Analyzing sentence {i}: {sentence}")
-
-                # Check LanceDB for existing fact check
-                query_results: DataFrame = self.table.search(sentence, query_type="vector").limit(
-                    1).to_pandas()
-                # If no exact match found, proceed with normal fact-checking
-                if query_results.empty:
-                    results.append(self._do_fact_check(sentence, i))
+        if not sentences:
+            return []
+
+        matches, vectors = self._find_stored_facts(sentences)
+
+        if self.executor is None or len(sentences) <= 1:
+            checked = [self._analyze_sentence(sentence, i, match)
+                       for i, (sentence, match) in enumerate(zip(sentences, matches), 1)]
+        else:
+            futures = [self.executor.submit(self._analyze_sentence, sentence, i, match)
+                       for i, (sentence, match) in enumerate(zip(sentences, matches), 1)]
+            checked = [future.result() for future in futures]
+
+        if usage is not None:
+            usage['sentences'] += len(checked)
+            usage.update(ORIGIN_USAGE[origin] for _, origin in checked)
+        if save:
+            # Stored fact checks are already saved
+            new_checks = [i for i, (_, origin) in enumerate(checked) if origin == ORIGIN_LLM]
+            if new_checks:
+                self.save_fact_checks_async([checked[i][0] for i in new_checks], [vectors[i] for i in new_checks])
+        return [result for result, _ in checked]
+
+    # Like analyze_text, but yields each sentence's result (carrying its id) as soon as it is ready:
+    # stored fact checks first, then new checks in the order they finish. With save, the new checks
+    # go to the background writer in one batch once the last one is yielded (or the caller stops).
+    def analyze_text_iter(self, text, usage=None, save=False):
+        from nltk.tokenize import sent_tokenize
+        sentences = sent_tokenize(text)
+        self.logger.debug(f"Tokenized {len(sentences)} sentences")
+        if not sentences:
+            return
+
+        matches, vectors = self._find_stored_facts(sentences)
+        new_results, new_vectors = [], []
+
+        def done(i, result, origin):
+            if usage is not None:
+                usage['sentences'] += 1
+                usage[ORIGIN_USAGE[origin]] += 1
+            # Stored fact checks are already saved
+            if save and origin == ORIGIN_LLM:
+                new_results.append(result)
+                new_vectors.append(vectors[i - 1])
+            return result
+
+        futures = {}
+        try:
+            new_checks = []
+            for i, (sentence, match) in enumerate(zip(sentences, matches), 1):
+                if self._is_stored_match(match):
+                    yield done(i, *self._analyze_sentence(sentence, i, match))
                 else:
-                    fact = query_results.iloc[0]
-                    # similarity = 1 / (1 + fact['_distance']) # trying to fix saving to LanceDB/Json
-                    # trying to fix saving to LanceDB/Json
-                    similarity = 1 / (1 + fact.get('_distance', 0))
-                    if similarity >= APIConfig.SIMILARITY_THRESHOLD:
-                        result = {
-                            'id': int(i),
-                            'sentence': str(fact['sentence']),
-                            'explanation': str(fact['explanation']),
-                            'rating': str(fact['rating']),
-                            'severity': str(fact['severity']),
-                            'key_points': fact['key_points'].tolist() if isinstance(fact['key_points'], np.ndarray) else fact['key_points'],
-                            'source': fact['source'].tolist() if isinstance(fact['source'], np.ndarray) else fact['source'],
-                            'check_date': fact['check_date'].isoformat() if notnull(fact['check_date']) else None,
-                        }
-                        results.append(result)
-                        self.logger.debug(
-                            f"Retrieved existing fact check for sentence {i}: {sentence}")
-                    else:
-                        results.append(self._do_fact_check(sentence, i))
+                    new_checks.append((sentence, i, match))
+
+            if self.executor is None:
+                for sentence, i, match in new_checks:
+                    yield done(i, *self._analyze_sentence(sentence, i, match))
+                return
+            futures = {self.executor.submit(self._analyze_sentence, sentence, i, match): i
+                       for sentence, i, match in new_checks}
+            for future in as_completed(futures):
+                yield done(futures[future], *future.result())
+        finally:
+            # Stopped early (the client went away): checks that haven't started are dropped
+            for future in futures:
+                future.cancel()
+            # One write for the whole text, like analyze_text
+            if new_results:
+                self.save_fact_checks_async(new_results, new_vectors)
+
+    # Closest stored fact check for each sentence (or None), and the vector each sentence was
+    # looked up with (None for exact repeats, answered from the sentence index without embedding).
+    # The rest are embedded in one batch; their vectors go on to dedup and insert when saved.
+    def _find_stored_facts(self, sentences):
+        matches = [None] * len(sentences)
+        vectors = [None] * len(sentences)
+        try:
+            for i, fact in enumerate(self.db.find_exact_facts(sentences)):
+                if fact is not None:
+                    matches[i] = {**fact, '_distance': 0.0}
+            misses = [i for i, match in enumerate(matches) if match is None]
+            if misses:
+                for i, vector in zip(misses, self.db.embed_sentences([sentences[i] for i in misses])):
+                    vectors[i] = vector
+                # One batched lookup for the whole request instead of a search per sentence
+                nearest = self.db.find_nearest_facts([vectors[i] for i in misses], columns=STORED_RESULT_COLUMNS)
+                for i, fact in zip(misses, nearest):
+                    matches[i] = fact
+            self.logger.debug(
+                f"{len(sentences) - len(misses)} of {len(sentences)} sentences matched exactly")
+        except Exception as e:
+            self.logger.error(f"Error looking up existing fact checks: {str(e)}")
+            self.logger.error(traceback.format_exc())
+        return matches, vectors
 
-            except Exception as e:
-                self.logger.error(f"Error analyzing sentence {i}: {str(e)}")
-                self.logger.error(traceback.format_exc())
-                results.append({
-                    'id': i,
-                    'sentence': sentence,
-                    'explanation': 'Error in fact-checking',
-                    'rating': 'Unknown',
-                    'severity': 'unknown',
-                    'source': 'Unknown'
-                })
-        return results
+    # Checks a single sentence and returns (result, origin), never raises so one bad sentence can't
+    # fail the whole request
+    def _analyze_sentence(self, sentence, i, fact=None):
+        try:
+            self.logger.debug(f"Analyzing sentence {i}: {sentence}")
+
+            # If no stored fact check was found, proceed with normal fact-checking
+            if not self._is_stored_match(fact):
+                result = self._do_fact_check(sentence, i)
+                # The LLM's answer has no id, streamed results need it to find their sentence
+                result['id'] = i
+                return result, ORIGIN_LLM
+
+            result = {
+                'id': int(i),
+                'sentence': str(fact['sentence']),
+                'explanation': str(fact['explanation']),
+                'rating': str(fact['rating']),
+                'severity': str(fact['severity']),
+                'key_points': list(fact['key_points'] or []),
+                'source': list(fact['source'] or []),
+                'check_date': fact['check_date'].isoformat() if fact.get('check_date') else None,
+            }
+            self.logger.debug(
+                f"Retrieved existing fact check for sentence {i}: {sentence}")
+            return result, ORIGIN_CACHE
+
+        except Exception as e:
+            self.logger.error(f"Error analyzing sentence {i}: {str(e)}")
+            self.logger.error(traceback.format_exc())
+            return {
+                'id': i,
+                'sentence': sentence,
+                'explanation': ERROR_EXPLANATION,
+                'rating': 'Unknown',
+                'severity': 'unknown',
+                'source': 'Unknown'
+            }, ORIGIN_ERROR
+
+    # A stored fact check close enough to answer the sentence without a new check
+    @staticmethod
+    def _is_stored_match(fact):
+        return fact is not None and 1 / (1 + (fact.get('_distance') or 0)) >= APIConfig.SIMILARITY_THRESHOLD
 
     def find_relevant_claim(self, sentence, claims):
         for claim in claims:
@@ -175,6 +344,13 @@ class FactChecker:
 
     def search_news(self, keywords: str, region: str = "wt-wt", safesearch: str = "moderate",
                     timelimit: str | None = None, max_results: int | None = None) -> list[dict[str, str]]:
+        cache_key = search_cache_key('ddg-news', keywords, region=region, safesearch=safesearch,
+                                     timelimit=timelimit, max_results=max_results)
+        cached = self.search_cache.get(cache_key)
+        if cached is not MISS:
+            self.logger.debug(f"Search cache hit for news query: {keywords}")
+            return cached
+
         results = self.ddgs.news(
             keywords=keywords,
             region=region,
@@ -183,17 +359,28 @@ class FactChecker:
             max_results=max_results
         )
         print(f"DuckDuckGo Results: {results}")
-        return list(results)  # Convert generator to list
+        results = list(results)  # Convert generator to list
+        if results:
+            self.search_cache.set(cache_key, results, APIConfig.NEWS_SEARCH_CACHE_TTL)
+        return results
 
     def googlepython_search(self, query, num_results=10, advanced=True):
         """
         Perform a Google search and return the results. Without using Custom Search JSON API.
+        Non-empty results are cached per normalized query for APIConfig.WEB_SEARCH_CACHE_TTL.
 
         :param query: The search query string
         :param num_results: The number of results to return (default: 10)
         :param advanced: Whether to use advanced search (default: True)
         :return: A list of search results
         """
+        cache_key = search_cache_key(
+            'google', query, num_results=num_results, advanced=advanced)
+        cached = self.search_cache.get(cache_key)
+        if cached is not MISS:
+            self.logger.debug(f"Search cache hit for Google query: {query}")
+            return [SearchResult(**r) if isinstance(r, dict) else r for r in cached]
+
         results = []
         search_generator = search(
             query, num_results=num_results, advanced=advanced)
@@ -201,16 +388,38 @@ class FactChecker:
         for result in search_generator:
             results.append(result)
         print(f"Search Results: {list(results)}")
+        # Empty result pages are usually throttling, so they aren't cached
+        if results:
+            self.search_cache.set(
+                cache_key, [vars(r) if isinstance(r, SearchResult) else r for r in results],
+                APIConfig.WEB_SEARCH_CACHE_TTL)
         return list(results)  # Convert generator to list
 
+    # Serves page text from the on-disk cache, fetching and extracting it only on a miss.
+    # 403/404 and extraction failures are cached for a shorter time, transient errors are not cached.
     def get_url_content(self, url, max_retries=0):
+        cache_key = normalize_url(url)
+        cached = self.content_cache.get(cache_key)
+        if cached is not MISS:
+            self.logger.debug(f"Content cache hit for URL {url}")
+            return cached
+
+        content, cacheable = self._fetch_url_content(url, max_retries)
+        if cacheable:
+            failed = content is None or content.startswith("Unable to extract content from")
+            ttl = APIConfig.CONTENT_CACHE_NEGATIVE_TTL if failed else APIConfig.CONTENT_CACHE_TTL
+            self.content_cache.set(cache_key, content, ttl)
+        return content
+
+    # Returns (content, cacheable)
+    def _fetch_url_content(self, url, max_retries=0):
         user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         ]
 
-        for attempt in range(max_retries):
+        for attempt in range(max_retries + 1):
             try:
                 headers = {
                     'User-Agent': random.choice(user_agents),
@@ -218,29 +427,28 @@ class FactChecker:
                     'Accept-Language': 'en-US,en;q=0.5',
                     'Referer': 'https://www.google.com/',
                     'DNT': '1',
-                    'Connection': 'keep-alive',
                     'Upgrade-Insecure-Requests': '1',
                 }
 
-                with httpx.Client(timeout=15.0, follow_redirects=True) as client:
-                    response = client.get(url, headers=headers)
+                # Stream the body so extraction can stop reading once it has the main content
+                with http_client.stream('GET', url, headers=headers, follow_redirects=True) as response:
                     response.raise_for_status()
 
                     final_url = str(response.url)
                     if urlparse(final_url).path == '/' and urlparse(url).path != '/':
                         print(
                             f"Redirected to main page for URL {url}. Attempting to find content.")
-                        return self.extract_relevant_content(response.text, url)
+                        return self.extract_relevant_content(
+                            response.iter_bytes(), url, encoding=response.charset_encoding), True
 
-                    content = response.text
                     extracted_content = self.extract_relevant_content(
-                        content, url)
-                    if not extracted_content:
-                        print(
-                            f"Failed to extract content from {url}. Using fallback method.")
-                        return self.fallback_content_extraction(url)
+                        response.iter_bytes(), url, encoding=response.charset_encoding)
+                if not extracted_content:
+                    print(
+                        f"Failed to extract content from {url}. Using fallback method.")
+                    return self.fallback_content_extraction(url)
 
-                    return extracted_content
+                return extracted_content, True
 
             except httpx.HTTPStatusError as e:
                 print(f"HTTP error {e.response.status_code} for URL {url}")
@@ -249,62 +457,40 @@ class FactChecker:
                     headers['Cookie'] = 'accept_cookies=1'
                 elif e.response.status_code in [404, 500, 502, 503, 504]:
                     print(f"Server error. Skipping URL.")
-                    return None
+                    return None, e.response.status_code == 404
                 else:
                     print(f"Unhandled HTTP error. Skipping URL.")
-                    return None
+                    return None, e.response.status_code < 500 and e.response.status_code not in [408, 429]
             except Exception as e:
                 print(
                     f"An unexpected error occurred while fetching URL {url}: {str(e)}")
-                return None
+                return None, False
 
-            wait_time = 2 ** attempt + random.uniform(0, 1)
-            print(f"Retrying in {wait_time:.2f} seconds...")
-            time.sleep(wait_time)
+            if attempt < max_retries:
+                wait_time = 2 ** attempt + random.uniform(0, 1)
+                print(f"Retrying in {wait_time:.2f} seconds...")
+                time.sleep(wait_time)
 
         print(
-            f"Failed to fetch content from {url} after {max_retries} attempts")
-        return None
+            f"Failed to fetch content from {url} after {max_retries + 1} attempts")
+        return None, True  # Only repeated 403s get here
 
     def is_content_valid(self, content):
-        soup = BeautifulSoup(content, 'html.parser')
-        text_content = soup.get_text(strip=True)
-        return len(text_content) > 500  # Adjust this threshold as needed
-
-    def extract_relevant_content(self, html_content, url):
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-
-        # Try to find the main content area
-        main_content = (
-            soup.find('main') or
-            soup.find('article') or
-            soup.find('div', class_='content') or
-            soup.find('div', class_='article-body') or
-            soup.find('div', id='article-body')
-        )
-
-        if main_content:
-            text_content = main_content.get_text(separator='\n', strip=True)
-        else:
-            # If no main content area found, get all paragraph text
-            paragraphs = soup.find_all('p')
-            text_content = '\n'.join([p.get_text(strip=True)
-                                      for p in paragraphs])
-
-        # If we still don't have much content, fall back to all text
-        if len(text_content) < 100:  # Lowered threshold
-            text_content = soup.get_text(separator='\n', strip=True)
-
-        if len(text_content) < 100:  # If still not enough content
+        return html_extractor.text_length(content) > 500  # Adjust this threshold as needed
+
+    # html_content may be a str, bytes or an iterable of byte chunks from a streamed response.
+    # Keeps the main/article/content-div heuristics, see tools/html_extractor.py
+    def extract_relevant_content(self, html_content, url, encoding=None):
+        text_content = html_extractor.extract_main_text(
+            html_content, max_chars=5000, encoding=encoding)
+        if not text_content:  # If still not enough content
             return None
 
         # Return first 5000 characters
-        return f"Extracted content from {url}:\n\n{text_content[:5000]}..."
+        return f"Extracted content from {url}:\n\n{text_content}..."
 
+    # Returns (content, cacheable) like _fetch_url_content. A request that fails is transient and
+    # gives (None, False); only pages fetched fine that still yield nothing are cached as failures.
     def fallback_content_extraction(self, url):
         # For MSN video pages
         if 'msn.com' in url and '/video/' in url:
@@ -312,96 +498,116 @@ class FactChecker:
             api_url = f"https://assets.msn.com/content/view/v2/Detail/en-ie/{video_id}"
 
             try:
-                response = httpx.get(api_url)
+                response = http_client.get(api_url)
+            except Exception as e:
+                print(f"Error fetching video content: {str(e)}")
+                return None, False
+            try:
                 data = response.json()
                 title = data.get('title', '')
                 description = data.get('description', '')
-                return f"Video content from {url}:\n\nTitle: {title}\n\nDescription: {description}"
+                return f"Video content from {url}:\n\nTitle: {title}\n\nDescription: {description}", True
             except Exception as e:
-                print(f"Error fetching video content: {str(e)}")
+                print(f"Error reading video content: {str(e)}")
 
         # For other MSN pages
         elif 'msn.com' in url:
             try:
-                response = httpx.get(url)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                script_tag = soup.find(
-                    'script', {'type': 'application/ld+json'})
-                if script_tag:
-                    data = json.loads(script_tag.string)
+                response = http_client.get(url)
+            except Exception as e:
+                print(f"Error fetching MSN content: {str(e)}")
+                return None, False
+            try:
+                ld_json = html_extractor.extract_ld_json(
+                    response.content, encoding=response.charset_encoding)
+                if ld_json is not None:
+                    data = json.loads(ld_json)
                     if isinstance(data, list):
                         data = data[0]
                     title = data.get('headline', '')
                     description = data.get('description', '')
-                    return f"Content from {url}:\n\nTitle: {title}\n\nDescription: {description}"
+                    return f"Content from {url}:\n\nTitle: {title}\n\nDescription: {description}", True
             except Exception as e:
-                print(f"Error fetching MSN content: {str(e)}")
+                print(f"Error reading MSN content: {str(e)}")
 
-        return f"Unable to extract content from {url}"
+        return f"Unable to extract content from {url}", True
 
-    def get_custom_search_fact_check(self, sentence, id):
-        # search_results = self.get_custom_search_results(sentence)
-        gpy_results = self.googlepython_search(sentence)
-        news_results = []  # Initialize news_results to an empty list to avoid local variable 'news_results' referenced before assignment if issues with duckduckgo
-        try:
-            news_results = self.search_news(
-                sentence, timelimit="w", max_results=10)
-        except Exception as e:
-            logging.warning(f"Error retrieving news duckduckgo results: {e}")
-
-        # context = []
-        news_context = []
-        gpy_context = []
-        successful_urls = []
-
-        ''' Process search_results
-        for result in search_results[:2]:
-            content = self.get_url_content(result['url'])
-            if content:
-                context.append(
-                    f"Title: {result['title']}\nContent: {content[:500]}...")
-            else:
-                context.append(
-                    f"Title: {result['title']}\nSnippet: {result.get('snippet', 'No snippet available')}")'''
-
-        # Process gpy_results
-        if isinstance(gpy_results, list):
-            for result in gpy_results[:2]:
+    # Runs both searches at once and fetches every candidate URL as soon as its search returns.
+    # Whatever has arrived when APIConfig.EVIDENCE_DEADLINE fires is used, the rest falls back to snippets.
+    def gather_evidence(self, sentence):
+        deadline = time.monotonic() + APIConfig.EVIDENCE_DEADLINE
+        searches = {
+            self.io_executor.submit(self.googlepython_search, sentence): 'gpy',
+            self.io_executor.submit(self.search_news, sentence, timelimit="w", max_results=10): 'news',
+        }
+        # kind -> [(url, title, fallback_text, fetch_future)] in search result order
+        candidates = {'gpy': [], 'news': []}
+        pending = set(searches)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.warning(
+                    f"Evidence deadline reached with {len(pending)} task(s) pending for: {sentence}")
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind = searches.get(future)
+                if kind is None:
+                    continue  # A page fetch finished, it is read back below
                 try:
-                    content = self.get_url_content(result.url)
-                    if content:
-                        gpy_context.append(
-                            f"Title: {result.title}\nContent: {content[:500]}...")
-                        print(f"Added URL to successful_urls: {result.url}")
-                        successful_urls.append(result.url)
-                    else:
-                        gpy_context.append(
-                            f"Title: {result.title}\nDescription: {result.description}")
-                        print(f"Added URL to successful_urls: {result.url}")
-                        successful_urls.append(result.url)
-                except AttributeError as e:
-                    self.logger.error(
-                        f"Error processing GPY search result: {str(e)}")
+                    search_results = future.result()
+                except Exception as e:
+                    logging.warning(f"Error retrieving {kind} search results: {e}")
                     continue
-        else:
-            self.logger.warning(
-                "gpy_results is not a list. Skipping GPY results processing.")
-
-        # Process news_results
-        if news_results:
-            for result in news_results[:2]:
-                content = self.get_url_content(result['url'])
+                if not isinstance(search_results, list):
+                    self.logger.warning(
+                        f"{kind} results is not a list. Skipping {kind} results processing.")
+                    continue
+                for result in search_results[:2]:
+                    try:
+                        if kind == 'gpy':
+                            url, title = result.url, result.title
+                            fallback = f"Description: {result.description}"
+                        else:
+                            url, title = result['url'], result['title']
+                            fallback = f"Excerpt: {result.get('body', 'No excerpt available')[:500]}..."
+                    except (AttributeError, KeyError, TypeError) as e:
+                        self.logger.error(
+                            f"Error processing {kind} search result: {str(e)}")
+                        continue
+                    fetch = self.io_executor.submit(self.get_url_content, url)
+                    candidates[kind].append((url, title, fallback, fetch))
+                    pending.add(fetch)
+
+        contexts = {'gpy': [], 'news': []}
+        successful_urls = []
+        for kind in ('gpy', 'news'):
+            for url, title, fallback, fetch in candidates[kind]:
+                content = None
+                if fetch.done():
+                    try:
+                        content = fetch.result()
+                    except Exception as e:
+                        self.logger.error(f"Error fetching {url}: {str(e)}")
+                else:
+                    fetch.cancel()  # Only cancels fetches that haven't started yet
                 if content:
-                    news_context.append(
-                        f"Title: {result['title']}\nContent: {content[:500]}...")
-                    successful_urls.append(result['url'])
+                    contexts[kind].append(
+                        f"Title: {title}\nContent: {content[:500]}...")
                 else:
-                    news_context.append(
-                        f"Title: {result['title']}\nExcerpt: {result.get('body', 'No excerpt available')[:500]}...")
-                    successful_urls.append(result['url'])
-        else:
+                    contexts[kind].append(f"Title: {title}\n{fallback}")
+                successful_urls.append(url)
+
+        if not candidates['news']:
             logging.info("No news results available. Proceeding with other sources.")
-                
+
+        return contexts['gpy'], contexts['news'], successful_urls
+
+    def get_custom_search_fact_check(self, sentence, id):
+        # search_results = self.get_custom_search_results(sentence)
+        gpy_context, news_context, successful_urls = self.gather_evidence(sentence)
+
         # context_str = "\n\n".join(context + gpy_context)
         context_str = "\n\n".join(gpy_context)
         news_context_str = "\n\n".join(news_context)
@@ -464,44 +670,57 @@ class FactChecker:
         )
         return response.choices[0].message['content'].strip()
 
-    def save_fact_check(self, result):
-        try:
-            new_fact = {
-                "sentence": result.get("sentence", ""),
-                "explanation": result.get("explanation", ""),
-                "rating": result.get("rating", ""),
-                "severity": result.get("severity", ""),
-                "key_points": result.get("key_points", []),
-                "source": result.get("source", []),
-                "check_date": date.today().isoformat()
-            }
-
-            added_to_db = self.db.add_fact_if_not_exists(new_fact)
-            logger.info(f"Added to DB: {added_to_db}")
+    def save_fact_check(self, result, vector=None):
+        return self.save_fact_checks([result], None if vector is None else [vector])[0]
 
-            if added_to_db:
-                # Save to JSON file
-                try:
-                    with open('fact_checks.json', 'r+') as f:
-                        try:
-                            data = json.load(f)
-                            if not isinstance(data, list):
-                                data = []
-                        except json.JSONDecodeError:
-                            data = []
-                        data.append(new_fact)
-                        f.seek(0)
-                        f.truncate()
-                        json.dump(data, f, indent=2)
-                    logger.info(
-                        f"Added new fact check to JSON file: '{new_fact['sentence']}'")
-                except FileNotFoundError:
-                    with open('fact_checks.json', 'w') as f:
-                        json.dump([new_fact], f, indent=2)
-                    logger.info(
-                        f"Created new JSON file and added fact check: '{new_fact['sentence']}'")
-
-            return added_to_db
+    # Saves all results of a request with one dedup pass and one LanceDB write, returns per-result added flags
+    def save_fact_checks(self, results, vectors=None):
+        try:
+            new_facts = []
+            saved = []
+            for i, result in enumerate(results):
+                # Failed checks carry no verdict worth keeping
+                if result.get("explanation") == ERROR_EXPLANATION:
+                    continue
+                new_facts.append({
+                    "sentence": result.get("sentence", ""),
+                    "explanation": result.get("explanation", ""),
+                    "rating": result.get("rating", ""),
+                    "severity": result.get("severity", ""),
+                    "key_points": result.get("key_points", []),
+                    "source": result.get("source", []),
+                    "check_date": date.today().isoformat()
+                })
+                saved.append(i)
+
+            added = [False] * len(results)
+            if not new_facts:
+                return added
+            added_to_db = self.db.add_facts_if_not_exist(
+                new_facts, None if vectors is None else [vectors[i] for i in saved])
+            logger.info(f"Added to DB: {sum(added_to_db)} of {len(new_facts)}")
+
+            added_facts = [fact for fact, was_added in zip(new_facts, added_to_db) if was_added]
+            if added_facts:
+                # Append to the JSONL archive, `flask export-facts` rebuilds fact_checks.json from it
+                self.journal.append_many(added_facts)
+                logger.info(
+                    f"Added {len(added_facts)} new fact check(s) to journal")
+
+            for i, was_added in zip(saved, added_to_db):
+                added[i] = was_added
+            return added
         except Exception as e:
             logger.error(f"Error saving fact check: {str(e)}")
-            raise  # Re-raise the exception after logging
\ No newline at end of file
+            raise  # Re-raise the exception after logging
+
+    # Hands the results to the background writer so the HTTP response isn't held up by persistence
+    def save_fact_checks_async(self, results, vectors=None):
+        future = self.save_executor.submit(
+            self.save_fact_checks, list(results), None if vectors is None else list(vectors))
+        future.add_done_callback(self._log_save_failure)
+        return future
+
+    def _log_save_failure(self, future):
+        if future.exception() is not None:
+            self.logger.error(f"Background save of fact checks failed: {future.exception()}")
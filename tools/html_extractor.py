@@ -0,0 +1,205 @@
+from lxml import etree
+
+# Characters of page text handed to the fact-check prompt
+MAX_CONTENT_CHARS = 5000
+# Below this the main-content heuristics are considered to have failed
+MIN_CONTENT_CHARS = 100
+# Never read more than this much of a response body
+MAX_CONTENT_BYTES = 2 * 1024 * 1024
+FEED_CHUNK_SIZE = 64 * 1024
+
+SKIPPED_TAGS = ('script', 'style')
+
+# Main content containers in priority order, the first match of the highest priority wins
+MAIN_CONTENT_CANDIDATES = (
+    ('main', lambda attrib: True),
+    ('article', lambda attrib: True),
+    ('div', lambda attrib: 'content' in attrib.get('class', '').split()),
+    ('div', lambda attrib: 'article-body' in attrib.get('class', '').split()),
+    ('div', lambda attrib: attrib.get('id') == 'article-body'),
+)
+
+
+class _ContentTarget:
+    """
+    lxml parser target that collects, in one pass and without building a tree, every piece of
+    text the extraction heuristics need: the first element of each main content candidate,
+    each <p>, the whole document and the first JSON-LD script. Collectors stop growing once
+    they hold max_chars, and `done` is set as soon as the top priority candidate is complete.
+    """
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.done = False
+        self.total_chars = 0
+        self.ld_json = None
+        # Per candidate: None until seen, then a [strings, joined_length] collector
+        self.candidates = [None] * len(MAIN_CONTENT_CANDIDATES)
+        self.paragraphs = []
+        self.paragraphs_length = 0
+        self.all_text = [[], 0]
+        self._open_collectors = []
+        self._open_paragraphs = []
+        self._stack = []
+        self._skip_depth = 0
+        self._ld_json_parts = None
+        self._buffer = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        opened = []
+        for i, (name, matches) in enumerate(MAIN_CONTENT_CANDIDATES):
+            if tag == name and self.candidates[i] is None and matches(attrib):
+                self.candidates[i] = [[], 0]
+                self._open_collectors.append(self.candidates[i])
+                opened.append(i)
+        is_paragraph = tag == 'p' and self.paragraphs_length < self.max_chars
+        if is_paragraph:
+            self.paragraphs.append([])
+            self._open_paragraphs.append(self.paragraphs[-1])
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+            if tag == 'script' and self.ld_json is None and self._ld_json_parts is None \
+                    and attrib.get('type') == 'application/ld+json':
+                self._ld_json_parts = []
+        self._stack.append((tag, opened, is_paragraph))
+
+    def end(self, tag):
+        self._flush()
+        if not self._stack:
+            return
+        tag, opened, is_paragraph = self._stack.pop()
+        for i in opened:
+            self._open_collectors.remove(self.candidates[i])
+        if is_paragraph:
+            self._open_paragraphs.pop()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth -= 1
+            if self._ld_json_parts is not None:
+                self.ld_json = ''.join(self._ld_json_parts)
+                self._ld_json_parts = None
+        # The first <main> decides the result as long as it has enough text
+        if 0 in opened and self.candidates[0][1] >= MIN_CONTENT_CHARS:
+            self.done = True
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self
+
+    def _flush(self):
+        # lxml may split one text node over several data() calls, the heuristics work on whole nodes
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer)
+        self._buffer = []
+        if self._ld_json_parts is not None:
+            self._ld_json_parts.append(text)
+        if self._skip_depth:
+            return
+        text = text.strip()
+        if not text:
+            return
+        self.total_chars += len(text)
+        for collector in [self.all_text] + self._open_collectors:
+            if collector[1] < self.max_chars:
+                collector[1] += len(text) + (1 if collector[0] else 0)
+                collector[0].append(text)
+        if self._open_paragraphs and self.paragraphs_length < self.max_chars:
+            self.paragraphs_length += len(text)
+            for paragraph in self._open_paragraphs:
+                paragraph.append(text)
+        main = self.candidates[0]
+        if main is not None and main in self._open_collectors and main[1] >= self.max_chars:
+            self.done = True
+
+    def main_text(self):
+        text = None
+        for collector in self.candidates:
+            if collector is not None:
+                text = '\n'.join(collector[0])
+                break
+        if text is None:
+            # If no main content area found, get all paragraph text
+            text = '\n'.join(''.join(paragraph) for paragraph in self.paragraphs)
+        # If we still don't have much content, fall back to all text
+        if len(text) < MIN_CONTENT_CHARS:
+            text = '\n'.join(self.all_text[0])
+        if len(text) < MIN_CONTENT_CHARS:
+            return None
+        return text[:self.max_chars]
+
+
+def _chunked(content):
+    if isinstance(content, (str, bytes)):
+        for i in range(0, len(content), FEED_CHUNK_SIZE):
+            yield content[i:i + FEED_CHUNK_SIZE]
+    else:
+        yield from content
+
+
+class _ChunkReader:
+    """
+    File-like view of the content for lxml's pull parser, reporting end of file once max_bytes
+    were read or until(target) is true.
+
+    libxml2's push parser (HTMLParser.feed) loses everything after a <script> or <style> whose
+    end tag is split over two chunks, and httpx chunks fall anywhere, so the body is pulled.
+    """
+
+    def __init__(self, content, target, max_bytes, until):
+        self._chunks = _chunked(content)
+        self._target = target
+        self._max_bytes = max_bytes
+        self._until = until
+        self._read = 0
+
+    def read(self, size=-1):
+        if self._read >= self._max_bytes or self._until(self._target):
+            return b''
+        for chunk in self._chunks:
+            if chunk:
+                self._read += len(chunk)
+                return chunk
+        return b''
+
+
+def parse(content, max_bytes=MAX_CONTENT_BYTES, max_chars=MAX_CONTENT_CHARS, encoding=None,
+          until=lambda target: target.done):
+    """
+    Stream HTML through lxml's C parser and return the populated _ContentTarget.
+
+    content may be a str, bytes or an iterable of byte chunks (e.g. httpx's iter_bytes()).
+    Reading stops after max_bytes or once until(target) is true, by default as soon as the
+    main content is known to be complete.
+    """
+    target = _ContentTarget(max_chars)
+    parser = etree.HTMLParser(target=target, encoding=encoding if not isinstance(content, str) else None,
+                              remove_comments=True, remove_pis=True, no_network=True)
+    try:
+        etree.parse(_ChunkReader(content, target, max_bytes, until), parser)
+    except etree.LxmlError:
+        # Recovering parser, whatever was collected before the error is still usable
+        target.close()
+    return target
+
+
+def extract_main_text(content, max_bytes=MAX_CONTENT_BYTES, max_chars=MAX_CONTENT_CHARS, encoding=None):
+    """Main article text of a page (at most max_chars), or None when there isn't enough of it."""
+    return parse(content, max_bytes, max_chars, encoding).main_text()
+
+
+def extract_ld_json(content, max_bytes=MAX_CONTENT_BYTES, encoding=None):
+    """Raw text of the first <script type="application/ld+json"> on the page, or None."""
+    return parse(content, max_bytes, encoding=encoding,
+                 until=lambda target: target.ld_json is not None).ld_json
+
+
+def text_length(content, max_bytes=MAX_CONTENT_BYTES, encoding=None):
+    """Number of visible text characters in the page, ignoring whitespace around text nodes."""
+    return parse(content, max_bytes, encoding=encoding, until=lambda target: False).total_chars
@@ -0,0 +1,92 @@
+import os
+import threading
+from contextlib import contextmanager
+from importlib.util import find_spec
+from urllib.parse import urlparse
+
+import httpx
+
+from config.api_config import APIConfig
+
+# One pooled client per process so connections, TLS sessions and DNS lookups are reused
+_client = None
+_client_lock = threading.Lock()
+
+# httpx only limits connections globally, so per-host limits are enforced with semaphores.
+# host -> [semaphore, requests holding or waiting for it]; an entry is dropped once that count
+# is back to 0, so /proxy's arbitrary hosts don't accumulate
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    # HTTP/2 needs the optional h2 package
+                    http2=find_spec("h2") is not None,
+                    limits=httpx.Limits(
+                        max_connections=APIConfig.HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=APIConfig.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=APIConfig.HTTP_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(
+                        APIConfig.HTTP_READ_TIMEOUT,
+                        connect=APIConfig.HTTP_CONNECT_TIMEOUT,
+                        pool=APIConfig.HTTP_POOL_TIMEOUT,
+                    ),
+                )
+    return _client
+
+
+def _reset_after_fork():
+    # Sockets and locks inherited from the parent must not be shared with forked workers
+    global _client, _client_lock, _host_slots, _host_slots_lock
+    _client = None
+    _client_lock = threading.Lock()
+    _host_slots = {}
+    _host_slots_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@contextmanager
+def _host_slot(url):
+    host = urlparse(str(url)).netloc.lower()
+    with _host_slots_lock:
+        entry = _host_slots.get(host)
+        if entry is None:
+            entry = _host_slots[host] = [threading.BoundedSemaphore(APIConfig.HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+        entry[1] += 1
+    try:
+        if not entry[0].acquire(timeout=APIConfig.HTTP_POOL_TIMEOUT):
+            raise httpx.PoolTimeout(f"Timed out waiting for a connection to {host}")
+        try:
+            yield
+        finally:
+            entry[0].release()
+    finally:
+        with _host_slots_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _host_slots[host]
+
+
+def request(method, url, **kwargs) -> httpx.Response:
+    with _host_slot(url):
+        return get_client().request(method, url, **kwargs)
+
+
+def get(url, **kwargs) -> httpx.Response:
+    return request("GET", url, **kwargs)
+
+
+@contextmanager
+def stream(method, url, **kwargs):
+    """Like httpx.Client.stream, holding the host slot until the body has been read."""
+    with _host_slot(url):
+        with get_client().stream(method, url, **kwargs) as response:
+            yield response
@@ -0,0 +1,102 @@
+import math
+import sqlite3
+import time
+from typing import List, Tuple
+
+from tools.disk_cache import SQLiteStore
+from tools.logger import logger
+
+
+def parse_rate_limits(spec: str) -> List[Tuple[float, float]]:
+    """Parse "5/60,15/86400" into (capacity, seconds to refill it) pairs, an empty spec means no limit."""
+    limits = []
+    for rule in filter(None, (part.strip() for part in spec.split(','))):
+        capacity, period = rule.split('/')
+        limits.append((float(capacity), float(period)))
+    return limits
+
+
+def describe_rate_limits(limits: List[Tuple[float, float]]) -> str:
+    """Readable form of parsed limits for error messages, e.g. "5 per minute and 15 per day"."""
+    units = {60: "minute", 3600: "hour", 86400: "day"}
+    return " and ".join(f"{capacity:g} per {units.get(period) or f'{period:g} seconds'}" for capacity, period in limits)
+
+
+class TokenBuckets(SQLiteStore):
+    """
+    Token buckets kept in a local SQLite file, so every worker process on the host draws on the same ones.
+
+    Each key has one bucket per limit: it holds up to `capacity` tokens and refills at capacity
+    per period. A request takes tokens from all of a key's buckets at once, or from none when
+    one of them is short. Buckets are stored as (tokens, time of last update) and refilled
+    lazily when next taken from, so idle keys cost nothing.
+    """
+
+    # Rows of buckets that have been full for a while are deleted every N takes
+    prune_every = 1000
+
+    def __init__(self, path: str, limits: List[Tuple[float, float]]):
+        super().__init__(path)
+        self.limits = limits
+        self._takes = 0
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                key TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (key, rule)
+            )""")
+
+    @staticmethod
+    def _rule(capacity, period):
+        return f"{capacity:g}/{period:g}"
+
+    def take(self, key: str, cost: float = 1) -> float:
+        """Take `cost` tokens for key. Returns 0 when allowed, otherwise the seconds until it would be."""
+        if not self.limits:
+            return 0
+        try:
+            return self._take(key, cost)
+        except sqlite3.Error as e:
+            # The limits guard against abuse, they are not worth failing requests over
+            logger.warning(f"Rate limit check failed for '{key}' in {self.path}: {e}")
+            return 0
+
+    def _take(self, key, cost):
+        conn = self._connect()
+        now = time.time()
+        # Taken before reading, so two workers can't both spend the same tokens
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = {rule: (tokens, updated_at) for rule, tokens, updated_at in conn.execute(
+                "SELECT rule, tokens, updated_at FROM token_buckets WHERE key = ?", (key,))}
+            buckets = []
+            retry_after = 0
+            for capacity, period in self.limits:
+                rule = self._rule(capacity, period)
+                tokens, updated_at = stored.get(rule, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * capacity / period)
+                if tokens < cost:
+                    retry_after = max(retry_after, (cost - tokens) * period / capacity)
+                buckets.append((rule, tokens))
+            if not retry_after:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO token_buckets (key, rule, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                    [(key, rule, tokens - cost, now) for rule, tokens in buckets])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._takes += 1
+        if self._takes % self.prune_every == 0:
+            self.prune()
+        return math.ceil(retry_after) if retry_after else 0
+
+    def prune(self):
+        """Delete buckets untouched for longer than their period, they are full again by now."""
+        now = time.time()
+        self._connect().executemany(
+            "DELETE FROM token_buckets WHERE rule = ? AND updated_at < ?",
+            [(self._rule(capacity, period), now - period) for capacity, period in self.limits])
@@ -0,0 +1,121 @@
+"""
+Process-wide shared resources, each created on first use and then reused by every thread.
+
+Heavy libraries are only imported inside the factories, so importing the app stays cheap and
+a worker never pays for what it doesn't serve. Under gunicorn's preload_app the master calls
+`preload()` to load the embedding model weights before forking, so every worker shares them
+copy-on-write. The model is never run there: inference starts the OpenMP / ONNX Runtime thread
+pools, which forked workers can deadlock on. Everything holding threads, sockets or file handles
+is created after the fork, and each worker calls `warmup()` before taking traffic.
+"""
+import os
+import threading
+
+from config.api_config import APIConfig
+from tools.logger import logger
+
+_factories = {}
+_instances = {}
+_lock = threading.RLock()
+
+
+def register(name):
+    def decorator(factory):
+        _factories[name] = factory
+        return factory
+    return decorator
+
+
+def get(name):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                logger.debug(f"Initializing shared resource '{name}'")
+                instance = _instances[name] = _factories[name]()
+    return instance
+
+
+def is_loaded(name) -> bool:
+    return name in _instances
+
+
+def preload():
+    """Load the embedding model weights (and nothing that must not cross a fork) into this process."""
+    embedder = get("embedder")
+    logger.info(f"Embedding model loaded ({embedder.ndims} dimensions)")
+
+
+def warmup():
+    """Create this worker's FactsDB and FactChecker and run the model once, so the first request finds them ready."""
+    get("fact_checker")
+    # One call so lazily initialized kernels, buffers and thread pools are set up here, after the fork
+    get("embedder").embed(["warmup"])
+
+
+@register("embedder")
+def _embedder():
+    from db.embeddings import create_embedder
+    if APIConfig.EMBEDDING_SERVER_SOCKET:
+        # The model lives in the embedding server, it is only loaded here if the server is down
+        from db.embedding_server import EmbeddingClient
+        return EmbeddingClient(APIConfig.EMBEDDING_SERVER_SOCKET, fallback=create_embedder)
+    return create_embedder()
+
+
+@register("facts_db")
+def _facts_db():
+    from db.facts_db import FactsDB
+    facts_db = FactsDB(db_uri=APIConfig.FACTS_DB_URI)
+    if APIConfig.DB_MAINTENANCE_INTERVAL:
+        from db.maintenance import start_scheduler
+        start_scheduler(facts_db, APIConfig.DB_MAINTENANCE_INTERVAL)
+    return facts_db
+
+
+@register("fact_checker")
+def _fact_checker():
+    from tools.fact_checker import FactChecker
+    return FactChecker(db=get("facts_db"))
+
+
+@register("user_db")
+def _user_db():
+    from db.user_db import UserDB
+    return UserDB()
+
+
+@register("usage_meter")
+def _usage_meter():
+    from tools.usage_meter import UsageMeter
+    return UsageMeter(get("user_db"), flush_interval=APIConfig.USAGE_FLUSH_INTERVAL)
+
+
+@register("free_rate_limits")
+def _free_rate_limits():
+    from tools.rate_limit import TokenBuckets, parse_rate_limits
+    return TokenBuckets(os.path.join(APIConfig.CACHE_DIR, 'rate_limits.sqlite'),
+                        parse_rate_limits(APIConfig.FREE_RATE_LIMITS))
+
+
+@register("paid_rate_limits")
+def _paid_rate_limits():
+    from tools.rate_limit import TokenBuckets, parse_rate_limits
+    return TokenBuckets(os.path.join(APIConfig.CACHE_DIR, 'rate_limits.sqlite'),
+                        parse_rate_limits(APIConfig.PAID_RATE_LIMITS))
+
+
+@register("stripe")
+def _stripe():
+    import stripe
+    from config.config import Config
+    stripe.api_key = Config.STRIPE_SECRET_KEY
+    return stripe
+
+
+@register("meme2txt")
+def _meme2txt():
+    # Pulls in pytesseract and PIL
+    from tools.meme2txt_processor import Meme2TxtProcessor
+    return Meme2TxtProcessor
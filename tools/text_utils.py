@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+# Typographic quotes and dashes that editors and browsers substitute for the ASCII ones
+_QUOTE_MAP = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"',
+    '–': '-', '—': '-',
+})
+_WHITESPACE_RE = re.compile(r'\s+')
+# Quotes around a sentence and punctuation at either end don't change which claim it is
+_EDGE_PUNCT_RE = re.compile(r'^[\s.!?;:,\'"]+|[\s.!?;:,\'"]+$')
+
+
+def normalize_text(text):
+    """Canonical form of a sentence or query: casefolded, ASCII quotes, single spaces, no quotes or punctuation at the ends."""
+    text = unicodedata.normalize('NFKC', text).translate(_QUOTE_MAP).casefold()
+    text = _WHITESPACE_RE.sub(' ', text)
+    return _EDGE_PUNCT_RE.sub('', text)
@@ -0,0 +1,64 @@
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
+
+from tools.logger import logger
+
+
+class UsageMeter:
+    """
+    Per-worker usage counters, flushed to the MySQL usage table in bulk.
+
+    Counts are aggregated in memory per (subject type, subject, day), e.g. ('user', auth0 id),
+    ('key', API key hash) or ('ip', address), so a request costs a dict update instead of a
+    database write. A daemon thread upserts everything gathered every `flush_interval` seconds in
+    one statement; counts that fail to flush are kept and go out with the next one.
+    """
+
+    fields = ("requests", "sentences", "cache_hits", "llm_calls")
+
+    def __init__(self, user_db, flush_interval: float):
+        self.user_db = user_db
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        threading.Thread(target=self._run, name="usage-flush", daemon=True).start()
+        # What is left when the worker shuts down
+        atexit.register(self.flush)
+
+    def record(self, subjects: dict, counts: dict):
+        """Add counts (keys other than fields are ignored) for every subject, given as {subject type: subject}."""
+        counts = {field: counts[field] for field in self.fields if counts.get(field)}
+        day = date.today()
+        with self._lock:
+            for subject_type, subject in subjects.items():
+                if subject:
+                    self._pending[(subject_type, subject, day)].update(counts)
+
+    def flush(self) -> int:
+        """Write the pending counts to MySQL, returns the number of rows upserted."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(Counter)
+            if not pending:
+                return 0
+            rows = [(subject_type, subject, day, *(counts[field] for field in self.fields))
+                    for (subject_type, subject, day), counts in pending.items()]
+            try:
+                self.user_db.add_usage(rows)
+            except Exception as e:
+                logger.error(f"Usage flush of {len(rows)} rows failed, retrying with the next one: {str(e)}")
+                with self._lock:
+                    for key, counts in pending.items():
+                        self._pending[key].update(counts)
+                return 0
+            logger.debug(f"Flushed usage for {len(rows)} subject(s)")
+            return len(rows)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()